@@ -0,0 +1,117 @@
+"""Сравнение бэкендов кэша под нагрузкой нескольких процессов.
+
+Каждый процесс имитирует воркер: читает общий набор ключей, при
+промахе записывает значение и увеличивает счётчик версии. Для
+каждого бэкенда печатаются операции в секунду, доля попаданий и
+итог счётчика (у общего кэша он равен числу всех incr).
+
+Запуск из корня репозитория:
+    python benchmarks/bench_cache.py --processes 4 --operations 5000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'filebased': 'django.core.cache.backends.filebased.FileBasedCache',
+    'sqlite': 'core.cache_backends.SQLiteCache',
+}
+KEYS = 1000  # Размер общего набора ключей
+VALUE = 'x' * 2048  # Размер значения, как у фрагмента ленты
+
+
+def worker(name, operations, seed, results):
+    from django.core.cache import caches
+    cache = caches[name]
+    rnd = random.Random(seed)
+    hits = 0
+    started = time.perf_counter()
+    for _ in range(operations):
+        key = f'key:{rnd.randrange(KEYS)}'
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            cache.set(key, VALUE)
+            cache.incr('version')
+        if rnd.random() < 0.05:
+            cache.get_many([f'key:{rnd.randrange(KEYS)}' for _ in range(10)])
+    results.put((hits, time.perf_counter() - started))
+
+
+def run(name, processes, operations):
+    from django.core.cache import caches
+    cache = caches[name]
+    cache.clear()
+    cache.set('version', 0, None)
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=worker,
+            args=(name, operations, seed, results)
+        )
+        for seed in range(processes)
+    ]
+    started = time.perf_counter()
+    for process in workers:
+        process.start()
+    stats = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - started
+    hits = sum(hit for hit, _ in stats)
+    total = processes * operations
+    print(f'{name:<10} {total / elapsed:>10.0f} оп/с'
+          f' {hits / total:>8.1%} попаданий'
+          f' {cache.get("version")!s:>8} версия')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--operations', type=int, default=5000)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS))
+    options = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    locations = {
+        'locmem': 'bench',
+        'filebased': os.path.join(directory, 'filebased'),
+        'sqlite': os.path.join(directory, 'cache.sqlite3'),
+    }
+    settings.configure(CACHES={
+        **{
+            name: {
+                'BACKEND': BACKENDS[name],
+                'LOCATION': locations[name],
+                'TIMEOUT': None,
+                'OPTIONS': {'MAX_ENTRIES': KEYS * 2},
+            }
+            for name in BACKENDS
+        },
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+        },
+    })
+    django.setup()
+    multiprocessing.set_start_method('fork')
+    print(f'{options.processes} процесса по {options.operations} операций')
+    try:
+        for name in options.backends:
+            run(name, options.processes, options.operations)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
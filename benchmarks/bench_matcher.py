@@ -0,0 +1,76 @@
+"""Сравнение поиска запрещённых слов: пересечение множеств и автомат.
+
+Пересечение множеств слов текста и словаря (прежняя проверка) находит
+только слова, отделённые пробелами. Автомат Ахо — Корасик находит также слова
+рядом со знаками препинания и фразы. Печатается время проверки одного
+текста для каждого сочетания размера словаря и размера текста, а также
+время сборки автомата.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_matcher.py
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+
+from obsceneLang.matcher import Matcher  # noqa: E402
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+LEXICON_SIZES = (100, 1000, 10000, 100000)
+TEXT_SIZES = (100, 10000, 1000000)  # Байт текста
+
+
+def _words(rnd, count):
+    return [
+        ''.join(rnd.choices(ALPHABET, k=rnd.randint(4, 10)))
+        for _ in range(count)
+    ]
+
+
+def _text(rnd, size, vocabulary):
+    words = []
+    length = 0
+    while length < size:
+        word = rnd.choice(vocabulary) + rnd.choice(('', '', ',', '.', '!'))
+        words.append(word)
+        length += len(word.encode()) + 1
+    return ' '.join(words)
+
+
+def _time(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+    rnd = random.Random(0)
+    vocabulary = _words(rnd, 5000)
+    texts = {size: _text(rnd, size, vocabulary) for size in TEXT_SIZES}
+
+    print(f'{"словарь":>8} {"текст, Б":>9} {"множества, мс":>14}'
+          f' {"автомат, мс":>12}')
+    for lexicon_size in LEXICON_SIZES:
+        # Словарь не пересекается с текстом: худший случай, полный проход
+        lexicon = frozenset(
+            word + 'ъ' for word in _words(rnd, lexicon_size))
+        build = _time(lambda: Matcher(lexicon), 1)
+        matcher = Matcher(lexicon)
+        for text_size, text in texts.items():
+            sets = _time(
+                lambda: bool(lexicon & set(text.lower().split())),
+                options.repeat
+            )
+            automaton = _time(lambda: matcher.search(text), options.repeat)
+            print(f'{lexicon_size:>8} {text_size:>9} {sets * 1000:>14.3f}'
+                  f' {automaton * 1000:>12.3f}')
+        print(f'{"":>8} сборка автомата: {build * 1000:.0f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import tempfile
 
 import pytest
+from django.core.cache import cache
 from mixer.backend.django import mixer as _mixer
 from posts.models import Post, Group
 
@@ -12,6 +13,13 @@ def mock_media(settings):
         yield temp_directory
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Транзакция теста не фиксируется, и версии лент не меняются:
+    # без очистки кэш страниц переживает откат базы между тестами
+    cache.clear()
+
+
 @pytest.fixture
 def mixer():
     return _mixer
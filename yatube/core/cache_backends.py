@@ -0,0 +1,230 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SQLITE_MAX_PARAMS = 900  # Параметров в одном запросе SQLite
+LRU_RESOLUTION = 1.0  # Точность отметки последнего чтения, сек
+BUSY_TIMEOUT = 5000  # Ожидание блокировки другим процессом, мс
+INTEGER_MIN, INTEGER_MAX = -2 ** 63, 2 ** 63 - 1  # Пределы INTEGER SQLite
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE TABLE IF NOT EXISTS cache_size ('
+    ' id INTEGER PRIMARY KEY CHECK (id = 0),'
+    ' entries INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO cache_size VALUES (0, 0)',
+    'CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache '
+    'BEGIN UPDATE cache_size SET entries = entries + 1; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache '
+    'BEGIN UPDATE cache_size SET entries = entries - 1; END',
+)
+UPSERT = (
+    'INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+    'expires = excluded.expires, accessed = excluded.accessed'
+)
+
+
+def _chunks(items, size=SQLITE_MAX_PARAMS):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _dump(value):
+    """Целые числа в пределах INTEGER хранятся как есть, остальное,
+    в том числе длинные целые, сериализуется."""
+    if type(value) is int and INTEGER_MIN <= value <= INTEGER_MAX:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _load(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в общем файле SQLite в режиме WAL.
+    Один файл разделяют все процессы сервера: инвалидация в одном
+    воркере видна остальным. Число записей ограничено MAX_ENTRIES,
+    при переполнении вытесняются давно не читавшиеся записи (LRU).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        """Соединение своё для каждого потока и процесса."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        connection = sqlite3.connect(self._path, timeout=BUSY_TIMEOUT / 1000,
+                                     isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT}')
+        with connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _write(self):
+        """Транзакция записи. BEGIN IMMEDIATE сразу берёт блокировку,
+        поэтому чтение и запись внутри неё атомарны между процессами.
+        При исключении транзакция откатывается."""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        made = {self._key(key, version): key for key in keys}
+        now = time.time()
+        found = {}
+        stale = []
+        connection = self._connection()
+        for chunk in _chunks(list(made)):
+            rows = connection.execute(
+                'SELECT key, value, expires, accessed FROM cache '
+                f'WHERE key IN ({",".join("?" * len(chunk))})', chunk
+            )
+            for key, value, expires, accessed in rows:
+                if expires is not None and expires <= now:
+                    continue
+                found[made[key]] = _load(value)
+                if accessed < now - LRU_RESOLUTION:
+                    stale.append(key)
+        if stale:
+            connection.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                [(now, key) for key in stale]
+            )
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expires(timeout)
+        now = time.time()
+        rows = [(self._key(key, version), _dump(value), expires, now)
+                for key, value in data.items()]
+        with self._write() as connection:
+            connection.executemany(UPSERT, rows)
+            self._cull(connection, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as connection:
+            row = connection.execute(
+                'SELECT expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and (row[0] is None or row[0] > now):
+                return False
+            connection.execute(
+                UPSERT, (key, _dump(value), self._expires(timeout), now)
+            )
+            self._cull(connection, now)
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        with self._write() as connection:
+            row = connection.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= time.time()):
+                raise ValueError(f"Key '{key}' not found")
+            value = _load(row[0])
+            if type(value) is not int:
+                raise ValueError(f"Key '{key}' is not an integer")
+            value += delta
+            connection.execute('UPDATE cache SET value = ? WHERE key = ?',
+                               (_dump(value), key))
+            return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._expires(timeout), key, time.time())
+        )
+        return bool(cursor.rowcount)
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        connection = self._connection()
+        for chunk in _chunks(keys):
+            connection.execute(
+                'DELETE FROM cache '
+                f'WHERE key IN ({",".join("?" * len(chunk))})', chunk
+            )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def _cull(self, connection, now):
+        """Вытеснить истёкшие, затем давно не читавшиеся записи."""
+        entries = connection.execute(
+            'SELECT entries FROM cache_size').fetchone()[0]
+        if entries <= self._max_entries:
+            return
+        connection.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        entries = connection.execute(
+            'SELECT entries FROM cache_size').fetchone()[0]
+        if entries <= self._max_entries:
+            return
+        excess = entries - self._max_entries
+        cull = max(excess, entries // self._cull_frequency
+                   if self._cull_frequency else entries)
+        connection.execute(
+            'DELETE FROM cache WHERE key IN '
+            '(SELECT key FROM cache ORDER BY accessed LIMIT ?)', (cull,)
+        )
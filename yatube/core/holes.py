@@ -0,0 +1,43 @@
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.template.loader import render_to_string
+
+HOLE_MARKER = '<!--hole:{name}|{params}-->'  # Метка дырки в каркасе
+HOLE_RE = re.compile(r'<!--hole:([\w./-]+)\|([^>]*)-->')
+
+_providers = {}
+
+
+def hole_provider(template_name):
+    """Зарегистрировать поставщика контекста для дырки.
+    При позднем рендеринге контекста представления нет, поставщик
+    восстанавливает нужные шаблону значения по request и параметрам.
+    """
+    def decorator(func):
+        _providers[template_name] = func
+        return func
+    return decorator
+
+
+def hole_marker(template_name, params):
+    """Метка дырки, которая подставляется в кэшируемый каркас."""
+    return HOLE_MARKER.format(name=template_name, params=urlencode(params))
+
+
+def render_hole(request, template_name, params):
+    """Поздний рендеринг дырки для текущего пользователя."""
+    context = dict(params)
+    provider = _providers.get(template_name)
+    if provider is not None:
+        context.update(provider(request, **params))
+    return render_to_string(template_name, context, request=request)
+
+
+def fill_holes(request, skeleton):
+    """Заполнить все дырки каркаса страницы."""
+    return HOLE_RE.sub(
+        lambda match: render_hole(request, match.group(1),
+                                  dict(parse_qsl(match.group(2)))),
+        skeleton
+    )
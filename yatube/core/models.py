@@ -1,7 +1,19 @@
-from django.db import models
+from django.db import models, transaction
 
 
-class CreatedModel(models.Model):
+class AtomicSaveModel(models.Model):
+    """Абстрактная модель. Сохранение вместе с обработчиками
+    сигналов pre_save и post_save выполняется в одной транзакции."""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class CreatedModel(AtomicSaveModel):
     """Абстрактная модель. Добавляет дату создания."""
     pub_date = models.DateTimeField(
         'Дата публикации',
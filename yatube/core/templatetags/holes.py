@@ -0,0 +1,21 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.holes import hole_marker
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **params):
+    """Пользовательский фрагмент страницы.
+    Работает как include, а при сборке кэшируемого каркаса
+    (request.punch_holes) оставляет метку для позднего рендеринга.
+    """
+    params = {name: value for name, value in params.items() if value}
+    request = context.get('request')
+    if getattr(request, 'punch_holes', False):
+        return mark_safe(hole_marker(template_name, params))
+    nested = context.template.engine.get_template(template_name)
+    with context.push(**params):
+        return mark_safe(nested.render(context))
@@ -1,7 +1,15 @@
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
 from http import HTTPStatus
+from unittest import mock
 
 from django.test import Client, TestCase
 
+from .cache_backends import SQLiteCache
+
 
 class CoreErrorTest(TestCase):
     """Тестирование шаблонов ошибки"""
@@ -23,3 +31,97 @@ class CoreErrorTest(TestCase):
             'core/404.html',
             'Шаблон 404 не найден'
         )
+
+
+def _increment(location, key, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr(key)
+
+
+class SQLiteCacheTest(TestCase):
+    """Тестирование общего кэша в файле SQLite"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_shared_between_instances(self):
+        """Запись одного экземпляра видна другому"""
+        self.cache.set('key', {'value': 1})
+        other = SQLiteCache(self.location, {})
+        self.assertEqual(other.get('key'), {'value': 1})
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_get_many_set_many(self):
+        """Пакетные операции и истечение срока"""
+        self.cache.set_many({'a': 1, 'b': 'два'})
+        self.cache.set('old', 3, timeout=-1)
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'old', 'missing']),
+            {'a': 1, 'b': 'два'}
+        )
+        self.assertFalse(self.cache.has_key('old'))
+        self.assertTrue(self.cache.add('old', 4))
+        self.assertFalse(self.cache.add('old', 5))
+        self.assertEqual(self.cache.get('old'), 4)
+
+    def test_incr(self):
+        """incr атомарен между процессами"""
+        self.cache.set('counter', 0)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        processes = [
+            multiprocessing.Process(target=_increment, args=(
+                self.location, 'counter', 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_long_integers(self):
+        """Целые вне 64 бит хранятся и увеличиваются без переполнения"""
+        big = 2 ** 63
+        self.cache.set('big', big)
+        self.assertEqual(self.cache.get('big'), big)
+        self.cache.set('edge', big - 1)
+        self.assertEqual(self.cache.incr('edge'), big)
+        self.assertEqual(self.cache.incr('big', -big), 0)
+        self.assertEqual(self.cache.get_many(['big', 'edge']),
+                         {'big': 0, 'edge': big})
+
+    def test_failed_write_rolled_back(self):
+        """Ошибка внутри записи откатывает транзакцию"""
+        with mock.patch.object(SQLiteCache, '_cull',
+                               side_effect=sqlite3.OperationalError):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.cache.set('key', 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                self.cache.add('other', 1)
+        self.cache.set('text', 'текст')
+        with self.assertRaises(ValueError):
+            self.cache.incr('text')
+        self.assertFalse(self.cache._connection().in_transaction)
+        self.assertEqual(self.cache.get_many(['key', 'other', 'text']),
+                         {'text': 'текст'})
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читавшиеся записи"""
+        cache = SQLiteCache(self.location, {
+            'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3}
+        })
+        for number in range(3):
+            cache.set(number, number)
+        connection = cache._connection()
+        connection.execute('UPDATE cache SET accessed = 0')
+        cache.get(0)
+        cache.set(3, 3)
+        self.assertEqual(cache.get_many(range(4)), {0: 0, 2: 2, 3: 3})
@@ -1,6 +1,15 @@
-from django.contrib import admin
+import io
 
-from .models import BannedWord
+from django.contrib import admin, messages
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .bulk import (READ_ERRORS, export_lexicon, import_lexicon, is_csv,
+                   read_lexicon)
+from .forms import LexiconImportForm
+from .models import BannedWord, ModerationFlag
 
 MAX_MESS_SIZE = 30  # Максимальный размер выводимого текста
 
@@ -20,9 +29,72 @@ class BannedWordAdmin(admin.ModelAdmin):
     list_filter = ('word_type',)
     list_editable = ('word_type',)
     empty_value_display = '-пусто-'
+    actions = ('export_csv',)
+    change_list_template = 'admin/obsceneLang/bannedword/change_list.html'
+
+    def get_urls(self):
+        return [
+            path('import/',
+                 self.admin_site.admin_view(self.import_view),
+                 name='obsceneLang_bannedword_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Загрузка словаря из файла пачками."""
+        if not self.has_add_permission(request):
+            return redirect('admin:obsceneLang_bannedword_changelist')
+        form = LexiconImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig',
+                                     newline='')
+            try:
+                diff = import_lexicon(
+                    read_lexicon(lines, csv_format=is_csv(upload.name)),
+                    word_type=form.cleaned_data['word_type'],
+                    dry_run=form.cleaned_data['dry_run']
+                )
+            except READ_ERRORS as error:
+                form.add_error('file', f'Не удалось прочитать файл: {error}')
+            else:
+                self.message_user(request, f'Отличия: {diff}',
+                                  messages.SUCCESS)
+                return redirect('admin:obsceneLang_bannedword_changelist')
+        return TemplateResponse(
+            request, 'admin/obsceneLang/bannedword/import.html', {
+                **self.admin_site.each_context(request),
+                'opts': self.model._meta,
+                'form': form,
+                'title': 'Загрузка словаря',
+            }
+        )
+
+    def export_csv(self, request, queryset):
+        """Выгрузить выбранные слова в CSV."""
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = (
+            'attachment; filename="banned_words.csv"')
+        export_lexicon(queryset, response, csv_format=True)
+        return response
+    export_csv.short_description = 'Выгрузить выбранные слова в CSV'
 
     def __str__(self) -> str:
         return self.banned_word[:MAX_MESS_SIZE]
 
 
+class ModerationFlagAdmin(admin.ModelAdmin):
+    """ Интерфейс администратора для отмеченных записей. """
+
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'words',
+        'created',
+    )
+    list_filter = ('kind',)
+    search_fields = ('words',)
+
+
 admin.site.register(BannedWord, BannedWordAdmin)
+admin.site.register(ModerationFlag, ModerationFlagAdmin)
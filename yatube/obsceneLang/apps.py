@@ -6,3 +6,6 @@ class ObscenelangConfig(AppConfig):
 
     name = 'obsceneLang'
     verbose_name = 'Обсценная лексика'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,111 @@
+import csv
+
+from django.db import transaction
+
+from .lexicon import bump_lexicon_version
+from .models import MAX_WORD_SIZE, BannedWord
+
+IMPORT_BATCH_SIZE = 1000  # Размер пачки при вставке слов
+CSV_FIELDS = ('banned_word', 'word_type', 'comments')
+DEFAULT_WORD_TYPE = 'не указан'
+# Ошибки чтения файла словаря: недоступный файл, не UTF-8, битый CSV
+READ_ERRORS = (OSError, UnicodeDecodeError, csv.Error)
+
+
+def clean_word(word):
+    """Привести слово к виду, в котором оно хранится в словаре."""
+    return ' '.join(word.split()).lower()
+
+
+def is_csv(name):
+    """Файл словаря в формате CSV, по расширению в любом регистре."""
+    return name.lower().endswith('.csv')
+
+
+def read_lexicon(lines, csv_format=False):
+    """Строки словаря из файла: словари с полями CSV_FIELDS.
+    В TXT одно слово на строку, строки с # пропускаются.
+    В CSV первая строка — заголовок с полями CSV_FIELDS.
+    """
+    if csv_format:
+        for row in csv.DictReader(lines):
+            yield {field: (row.get(field) or '').strip()
+                   for field in CSV_FIELDS}
+        return
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield {'banned_word': line, 'word_type': '', 'comments': ''}
+
+
+class LexiconDiff:
+    """Отличия файла словаря от таблицы BannedWord."""
+
+    def __init__(self):
+        self.new = {}  # Слово -> BannedWord для вставки
+        self.existing = 0  # Уже есть в таблице
+        self.duplicates = 0  # Повторы внутри файла
+        self.invalid = []  # Пустые и слишком длинные слова
+        self.missing = 0  # Есть в таблице, но нет в файле
+
+    def __str__(self):
+        return (
+            f'новых {len(self.new)}, уже есть {self.existing}, '
+            f'повторов {self.duplicates}, некорректных {len(self.invalid)}, '
+            f'только в таблице {self.missing}'
+        )
+
+
+def diff_lexicon(rows, word_type=DEFAULT_WORD_TYPE):
+    """Сравнить строки словаря с таблицей без записи в БД."""
+    diff = LexiconDiff()
+    table = {clean_word(word) for word in BannedWord.objects.values_list(
+        'banned_word', flat=True).iterator()}
+    seen = set()
+    for row in rows:
+        word = clean_word(row['banned_word'])
+        if not word or len(word) > MAX_WORD_SIZE:
+            diff.invalid.append(row['banned_word'])
+            continue
+        if word in seen:
+            diff.duplicates += 1
+            continue
+        seen.add(word)
+        if word in table:
+            diff.existing += 1
+            continue
+        diff.new[word] = BannedWord(
+            banned_word=word,
+            word_type=row['word_type'][:MAX_WORD_SIZE] or word_type,
+            comments=row['comments']
+        )
+    diff.missing = len(table - seen)
+    return diff
+
+
+def import_lexicon(rows, word_type=DEFAULT_WORD_TYPE, dry_run=False):
+    """Добавить в таблицу новые слова пачками.
+    bulk_create не отправляет сигналы, поэтому версия словаря
+    сменяется один раз после фиксации вставки.
+    """
+    diff = diff_lexicon(rows, word_type)
+    if diff.new and not dry_run:
+        with transaction.atomic():
+            BannedWord.objects.bulk_create(diff.new.values(),
+                                           batch_size=IMPORT_BATCH_SIZE,
+                                           ignore_conflicts=True)
+            transaction.on_commit(bump_lexicon_version)
+    return diff
+
+
+def export_lexicon(queryset, stream, csv_format=False):
+    """Записать слова в поток по одному запросу на пачку."""
+    rows = queryset.order_by('pk').values_list(*CSV_FIELDS).iterator(
+        chunk_size=IMPORT_BATCH_SIZE)
+    if csv_format:
+        writer = csv.writer(stream)
+        writer.writerow(CSV_FIELDS)
+        writer.writerows(rows)
+        return
+    for word, _, _ in rows:
+        stream.write(f'{word}\n')
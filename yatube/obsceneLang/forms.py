@@ -0,0 +1,19 @@
+from django import forms
+
+from .bulk import DEFAULT_WORD_TYPE
+from .models import MAX_WORD_SIZE
+
+
+class LexiconImportForm(forms.Form):
+    """Форма загрузки словаря из файла в админке."""
+
+    file = forms.FileField(label='Файл словаря',
+                           help_text='TXT, слово на строку, или CSV '
+                                     'с колонками banned_word, word_type, '
+                                     'comments')
+    word_type = forms.CharField(label='Тип слова',
+                                max_length=MAX_WORD_SIZE,
+                                initial=DEFAULT_WORD_TYPE,
+                                help_text='Если тип не указан в файле')
+    dry_run = forms.BooleanField(label='Только показать отличия',
+                                 required=False)
@@ -0,0 +1,66 @@
+from time import time
+
+from django.core.cache import cache
+
+from .matcher import Matcher
+from .models import BannedWord
+from .normalize import expand
+
+LEXICON_VERSION_KEY = 'banned_words_version'
+
+_lexicon = (None, frozenset(), Matcher(()))  # Словарь текущего процесса
+
+
+def _new_version():
+    """Версия из времени: после вытеснения ключа не повторится."""
+    return int(time() * 1000)
+
+
+def lexicon_version():
+    """Текущая версия словаря. Отсутствующая версия создаётся."""
+    version = cache.get(LEXICON_VERSION_KEY)
+    if version is None:
+        version = _new_version()
+        cache.add(LEXICON_VERSION_KEY, version, None)
+        version = cache.get(LEXICON_VERSION_KEY, version)
+    return version
+
+
+def bump_lexicon_version():
+    """Сменить версию словаря. Воркеры пересоберут его при обращении."""
+    try:
+        cache.incr(LEXICON_VERSION_KEY)
+    except ValueError:
+        cache.set(LEXICON_VERSION_KEY, _new_version(), None)
+
+
+def build_lexicon():
+    """Собрать нормализованный словарь из BannedWord."""
+    return frozenset(
+        word.lower() for word in
+        BannedWord.objects.values_list('banned_word', flat=True).iterator()
+    )
+
+
+def _current():
+    """Версия, словарь и автомат процесса.
+    Пересобираются, только если сменилась версия.
+    """
+    global _lexicon
+    version = lexicon_version()
+    if _lexicon[0] != version:
+        words = build_lexicon()
+        _lexicon = (version, words, Matcher(expand(words)))
+    return _lexicon
+
+
+def get_lexicon():
+    """Словарь процесса."""
+    return _current()[1]
+
+
+def get_matcher():
+    """Автомат поиска слов словаря процесса.
+    Построен по всем вариантам слов и ищет в нормализованном тексте.
+    """
+    return _current()[2]
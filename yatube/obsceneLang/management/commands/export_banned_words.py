@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from obsceneLang.bulk import export_lexicon, is_csv
+from obsceneLang.models import BannedWord
+
+
+class Command(BaseCommand):
+    """Выгрузка словаря запрещенных слов в файл."""
+
+    help = 'Выгружает запрещенные слова в TXT или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?',
+                            help='Файл .txt или .csv, по умолчанию stdout')
+        parser.add_argument('--csv', action='store_true',
+                            help='CSV при выводе в stdout')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if path is None:
+            export_lexicon(BannedWord.objects.all(), self.stdout,
+                           csv_format=options['csv'])
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            export_lexicon(BannedWord.objects.all(), stream,
+                           csv_format=is_csv(path))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from obsceneLang.bulk import (DEFAULT_WORD_TYPE, READ_ERRORS, import_lexicon,
+                              is_csv, read_lexicon)
+
+
+class Command(BaseCommand):
+    """Загрузка словаря запрещенных слов из файла."""
+
+    help = ('Загружает запрещенные слова из TXT (слово на строку) '
+            'или CSV и показывает отличия от текущего словаря')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл словаря, .txt или .csv')
+        parser.add_argument('--word-type', default=DEFAULT_WORD_TYPE,
+                            help='Тип слова, если он не указан в файле')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать отличия')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as lines:
+                diff = import_lexicon(
+                    read_lexicon(lines, csv_format=is_csv(path)),
+                    word_type=options['word_type'],
+                    dry_run=options['dry_run']
+                )
+        except READ_ERRORS as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+        for word in diff.invalid:
+            self.stderr.write(f'Некорректное слово: {word!r}')
+        verb = 'Будет добавлено' if options['dry_run'] else 'Добавлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb}: {len(diff.new)}. Отличия: {diff}'
+        ))
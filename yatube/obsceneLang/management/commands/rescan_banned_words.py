@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from obsceneLang.models import ModerationFlag
+from obsceneLang.rescan import RESCAN_CHUNK_SIZE, rescan
+
+
+class Command(BaseCommand):
+    """Повторная проверка постов и комментариев текущим словарем."""
+
+    help = ('Проверяет посты и комментарии на запрещенные слова '
+            'и отмечает найденные для модерации')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', action='append',
+            choices=[kind for kind, _ in ModerationFlag.KINDS],
+            help='Тип записей, по умолчанию все'
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Проверить только записи, добавленные после прошлой '
+                 'проверки'
+        )
+        parser.add_argument('--workers', type=int,
+                            help='Число процессов, по умолчанию по ядрам')
+        parser.add_argument('--chunk-size', type=int,
+                            default=RESCAN_CHUNK_SIZE,
+                            help='Записей в одной пачке')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным')
+        kinds = options['kind'] or [kind for kind, _ in ModerationFlag.KINDS]
+        for kind in kinds:
+            scanned, flagged = rescan(
+                kind, incremental=options['incremental'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size']
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind}: проверено {scanned}, отмечено {flagged}'
+            ))
@@ -0,0 +1,86 @@
+from collections import deque
+from typing import Iterable, Iterator, Tuple
+
+Match = Tuple[int, int, str]  # Начало, конец и найденное слово
+
+
+class Matcher:
+    """Автомат Ахо — Корасик по списку слов.
+    Строится один раз, после чего находит все вхождения всех слов
+    за один проход по тексту независимо от размера словаря.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self._goto = [{}]  # Переходы по символу из каждого состояния
+        self._fail = [0]  # Переход при несовпадении
+        self._out = [()]  # Длины слов, заканчивающихся в состоянии
+        for word in words:
+            if word:
+                self._add(word.lower())
+        self._link()
+
+    def __len__(self):
+        return sum(1 for out in self._out if out)
+
+    def _add(self, word):
+        node = 0
+        for char in word:
+            following = self._goto[node].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[node][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = following
+        self._out[node] = (len(word),)
+
+    def _link(self):
+        """Проложить переходы при несовпадении обходом в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, following in self._goto[node].items():
+                queue.append(following)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[following] = fail
+                self._out[following] += self._out[fail]
+
+    def finditer(self, text: str, whole_words: bool = True) -> Iterator[Match]:
+        """Вхождения слов в текст.
+        При whole_words вхождение должно быть отделено от соседних букв
+        и цифр: пробелом, знаком препинания или краем текста.
+        Поиск идёт в тексте в нижнем регистре, а начало и конец
+        указывают на символы переданного текста: lower() может
+        превратить один символ в несколько (İ).
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        lowered = text.lower()
+        origin = None
+        if len(lowered) != len(text):
+            origin = [index for index, char in enumerate(text)
+                      for _ in char.lower()]
+        node = 0
+        for index, char in enumerate(lowered):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length in out[node]:
+                start, end = index + 1 - length, index + 1
+                if whole_words and (
+                    start and lowered[start - 1].isalnum()
+                    or end < len(lowered) and lowered[end].isalnum()
+                ):
+                    continue
+                if origin is None:
+                    yield start, end, lowered[start:end]
+                else:
+                    yield (origin[start], origin[end - 1] + 1,
+                           lowered[start:end])
+
+    def search(self, text: str, whole_words: bool = True) -> bool:
+        """Есть ли в тексте хотя бы одно слово."""
+        return next(self.finditer(text, whole_words), None) is not None
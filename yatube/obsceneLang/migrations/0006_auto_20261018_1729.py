@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obsceneLang', '0005_auto_20230427_1724'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationFlag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10, verbose_name='Тип записи')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Номер записи')),
+                ('words', models.TextField(verbose_name='Найденные слова')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата проверки')),
+            ],
+            options={
+                'verbose_name': 'Отмеченная запись',
+                'verbose_name_plural': 'Отмеченные записи',
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.CreateModel(
+            name='RescanCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10, unique=True, verbose_name='Тип записи')),
+                ('last_id', models.PositiveIntegerField(default=0, verbose_name='Последний проверенный номер')),
+                ('finished', models.BooleanField(default=False, verbose_name='Проверка завершена')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Отметка проверки',
+                'verbose_name_plural': 'Отметки проверки',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='moderationflag',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_moderation_flag'),
+        ),
+    ]
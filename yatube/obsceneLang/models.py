@@ -23,3 +23,45 @@ class BannedWord(models.Model):
         ordering = ('banned_word',)
         verbose_name = 'Запрещенное слово'
         verbose_name_plural = 'Запрещенные слова'
+
+
+class ModerationFlag(models.Model):
+    """ Запись, в которой повторная проверка нашла запрещенные слова. """
+
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField('Тип записи', max_length=10, choices=KINDS)
+    object_id = models.PositiveIntegerField('Номер записи')
+    words = models.TextField('Найденные слова')
+    created = models.DateTimeField('Дата проверки', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Отмеченная запись'
+        verbose_name_plural = 'Отмеченные записи'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('kind', 'object_id'),
+                name='unique_moderation_flag'
+            ),
+        )
+
+
+class RescanCheckpoint(models.Model):
+    """ Место, до которого дошла повторная проверка записей. """
+
+    kind = models.CharField('Тип записи', max_length=10,
+                            choices=ModerationFlag.KINDS, unique=True)
+    last_id = models.PositiveIntegerField('Последний проверенный номер',
+                                          default=0)
+    finished = models.BooleanField('Проверка завершена', default=False)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Отметка проверки'
+        verbose_name_plural = 'Отметки проверки'
@@ -0,0 +1,103 @@
+import re
+from typing import List, Tuple
+
+# Латинские двойники кириллических букв, заглавные отдельно:
+# строчная b похожа на ь, а заглавная B на в
+HOMOGLYPHS = {
+    'a': 'а', 'c': 'с', 'e': 'е', 'k': 'к', 'm': 'м', 'o': 'о',
+    'p': 'р', 't': 'т', 'u': 'и', 'x': 'х', 'y': 'у', 'b': 'ь',
+    'A': 'а', 'B': 'в', 'C': 'с', 'E': 'е', 'H': 'н', 'K': 'к',
+    'M': 'м', 'O': 'о', 'P': 'р', 'T': 'т', 'X': 'х', 'Y': 'у',
+    'ё': 'е', 'Ё': 'е',
+}
+# Цифры и знаки вместо букв
+LEET = {
+    '0': 'о', '3': 'з', '4': 'ч', '6': 'б', '8': 'в', '@': 'а',
+}
+# Невидимые символы удаляются
+INVISIBLE = '\u00ad\u200b\u200c\u200d\u2060\ufeff'
+
+TABLE = str.maketrans({**HOMOGLYPHS, **LEET, **dict.fromkeys(INVISIBLE)})
+
+SEPARATORS = r'[\s.\-_*·\'"`~+|/\\]'
+# Буквы вразрядку с одним и тем же разделителем, не меньше четырёх:
+# «р е д и с к а», «р.е.д.и.с.к.а»
+SPACED = re.compile(
+    rf'(?<![^\W_])[^\W_](?P<sep>{SEPARATORS}+)[^\W_](?![^\W_])'
+    rf'(?:(?P=sep)[^\W_](?![^\W_])){{2,}}'
+)
+# Знаки внутри слова: «ре-ди-ска», «ред*ска»
+INNER = re.compile(r'(?<=[^\W\d_])[.\-_*·]+(?=[^\W\d_])')
+REPEATED = re.compile(r'([^\W\d_])\1+')
+SEPARATOR = re.compile(SEPARATORS)
+
+
+def _join(match):
+    return SEPARATOR.sub('', match.group())
+
+
+def normalize(text: str) -> str:
+    """Привести текст к виду, в котором ищутся слова словаря.
+    Двойники, цифры и невидимые символы заменяются одной таблицей
+    str.translate, затем склеиваются буквы вразрядку и через дефис,
+    а повторы букв схлопываются.
+    """
+    text = text.translate(TABLE).lower()
+    text = SPACED.sub(_join, text)
+    text = INNER.sub('', text)
+    return REPEATED.sub(r'\1', text)
+
+
+def _keep_letters(match):
+    return (index for index in range(*match.span())
+            if not SEPARATOR.match(match.string[index]))
+
+
+def _keep_none(match):
+    return ()
+
+
+def _keep_first(match):
+    return (match.start(),)
+
+
+def _delete(pattern, keep, text, origin):
+    """Удалить символы совпадений pattern, кроме тех, что вернёт keep,
+    вместе с их позициями в origin."""
+    kept = []
+    position = 0
+    for match in pattern.finditer(text):
+        kept.extend(range(position, match.start()))
+        kept.extend(keep(match))
+        position = match.end()
+    kept.extend(range(position, len(text)))
+    return ''.join(text[i] for i in kept), [origin[i] for i in kept]
+
+
+def normalize_with_origin(text: str) -> Tuple[str, List[int]]:
+    """То же, что normalize, и для каждого символа результата - его
+    позиция в исходном тексте. После замены таблицей все шаги
+    normalize только удаляют символы, поэтому позиции сохраняются.
+    """
+    chars, origin = [], []
+    for index, char in enumerate(text):
+        replaced = char.translate(TABLE).lower()
+        chars.append(replaced)
+        origin.extend([index] * len(replaced))
+    text = ''.join(chars)
+    text, origin = _delete(SPACED, _keep_letters, text, origin)
+    text, origin = _delete(INNER, _keep_none, text, origin)
+    return _delete(REPEATED, _keep_first, text, origin)
+
+
+def variants(word: str) -> set:
+    """Варианты слова словаря: как записано и нормализованное.
+    Вычисляются один раз при сборке словаря.
+    """
+    return {word.lower(), normalize(word)}
+
+
+def expand(words) -> frozenset:
+    """Все варианты всех слов словаря."""
+    return frozenset(
+        variant for word in words for variant in variants(word))
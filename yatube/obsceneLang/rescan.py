@@ -0,0 +1,135 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from django.db import connections, transaction
+
+from posts.models import Comment, Post
+
+from .lexicon import get_lexicon
+from .matcher import Matcher
+from .models import ModerationFlag, RescanCheckpoint
+from .normalize import expand, normalize
+
+RESCAN_CHUNK_SIZE = 2000  # Записей в одной пачке
+SOURCES = {
+    ModerationFlag.POST: Post,
+    ModerationFlag.COMMENT: Comment,
+}
+
+_matcher = Matcher(())  # Автомат процесса пула
+
+
+def _init_worker(words):
+    """Собрать автомат один раз на процесс пула."""
+    global _matcher
+    _matcher = Matcher(words)
+
+
+def _scan_chunk(rows):
+    """Найти запрещенные слова в пачке (id, text)."""
+    found = []
+    for pk, text in rows:
+        words = {word for _, _, word in _matcher.finditer(normalize(text))}
+        if words:
+            found.append((pk, sorted(words)))
+    return found
+
+
+class _InlineExecutor:
+    """Проверка в текущем процессе, без пула."""
+
+    def __init__(self, words):
+        _init_worker(words)
+
+    def submit(self, function, *args):
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def _chunks(model, last_id, chunk_size):
+    """Пачки (id, text) по возрастанию первичного ключа.
+    Каждая пачка читается отдельным запросом от последнего id,
+    поэтому в памяти не больше одной пачки на процесс.
+    """
+    while True:
+        rows = [
+            (obj.pk, obj.text) for obj in model.objects.filter(
+                pk__gt=last_id
+            ).order_by('pk').only('id', 'text')[:chunk_size].iterator()
+        ]
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _save(checkpoint, last_id, found):
+    """Записать отметки пачки и сдвинуть контрольную точку."""
+    with transaction.atomic():
+        ModerationFlag.objects.bulk_create(
+            (ModerationFlag(kind=checkpoint.kind, object_id=pk,
+                            words=', '.join(words))
+             for pk, words in found),
+            ignore_conflicts=True
+        )
+        checkpoint.last_id = last_id
+        checkpoint.save(update_fields=('last_id', 'updated'))
+
+
+def rescan(kind, incremental=False, workers=None,
+           chunk_size=RESCAN_CHUNK_SIZE):
+    """Проверить записи вида kind текущим словарем.
+    Прерванная проверка продолжается с контрольной точки. При
+    incremental проверяются только записи, добавленные после прошлой
+    проверки; иначе завершенная проверка начинается заново.
+    Возвращает число проверенных и отмеченных записей.
+    """
+    checkpoint, _ = RescanCheckpoint.objects.get_or_create(kind=kind)
+    if checkpoint.finished and not incremental:
+        checkpoint.last_id = 0
+    checkpoint.finished = False
+    checkpoint.save()
+
+    words = expand(get_lexicon())
+    workers = workers or os.cpu_count()
+    if workers > 1:
+        # Процессы пула не должны наследовать открытые соединения с БД
+        for connection in connections.all():
+            if not connection.in_atomic_block:
+                connection.close()
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                       initargs=(words,))
+    else:
+        executor = _InlineExecutor(words)
+
+    scanned = flagged = 0
+    pending = deque()
+
+    def save_oldest():
+        nonlocal flagged
+        last_id, future = pending.popleft()
+        found = future.result()
+        _save(checkpoint, last_id, found)
+        flagged += len(found)
+
+    try:
+        for rows in _chunks(SOURCES[kind], checkpoint.last_id, chunk_size):
+            pending.append((rows[-1][0], executor.submit(_scan_chunk, rows)))
+            scanned += len(rows)
+            if len(pending) > workers:
+                save_oldest()
+        while pending:
+            save_oldest()
+    finally:
+        # shutdown(cancel_futures=True) есть только с Python 3.9
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown()
+    checkpoint.finished = True
+    checkpoint.save(update_fields=('finished', 'updated'))
+    return scanned, flagged
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .lexicon import bump_lexicon_version
+from .models import BannedWord
+
+
+@receiver(post_save, sender=BannedWord)
+@receiver(post_delete, sender=BannedWord)
+def banned_word_changed(sender, **kwargs):
+    """Изменение списка слов, в том числе из админки, сбрасывает словарь
+    после фиксации транзакции: иначе воркер может собрать старый
+    словарь под новой версией."""
+    transaction.on_commit(bump_lexicon_version)
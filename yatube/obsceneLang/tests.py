@@ -0,0 +1,351 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.forms import PostForm
+from posts.models import Comment, Post
+from posts.tests.utils import run_on_commit
+
+from . import lexicon
+from .matcher import Matcher
+from .models import BannedWord, ModerationFlag, RescanCheckpoint
+from .normalize import normalize, normalize_with_origin
+from .rescan import rescan
+from .utils import find_bad_words
+
+User = get_user_model()
+
+
+class LexiconTest(TestCase):
+    """Тестирование словаря запрещённых слов процесса"""
+
+    def setUp(self):
+        cache.clear()
+        lexicon._lexicon = (None, frozenset(), Matcher(()))
+        self.word = BannedWord.objects.create(
+            banned_word='Редиска', word_type='сущ.')
+
+    def test_lexicon_built_once(self):
+        """Без смены версии словарь не перечитывается из базы"""
+        self.assertEqual(lexicon.get_lexicon(), {'редиска'})
+        with self.assertNumQueries(0):
+            self.assertIs(lexicon.get_lexicon(), lexicon.get_lexicon())
+
+    def test_lexicon_rebuilt_on_change(self):
+        """Сохранение и удаление слова сбрасывают словарь"""
+        lexicon.get_lexicon()
+        with run_on_commit():
+            BannedWord.objects.create(banned_word='Негодяй',
+                                      word_type='сущ.')
+            self.assertEqual(lexicon.get_lexicon(), {'редиска'})
+        self.assertEqual(lexicon.get_lexicon(), {'редиска', 'негодяй'})
+        self.word.banned_word = 'Редис'
+        with run_on_commit():
+            self.word.save()
+        self.assertIn('редис', lexicon.get_lexicon())
+        with run_on_commit():
+            self.word.delete()
+        self.assertEqual(lexicon.get_lexicon(), {'негодяй'})
+
+    def test_lexicon_rebuilt_on_foreign_bump(self):
+        """Смена версии другим воркером видна через общий кэш"""
+        lexicon.get_lexicon()
+        BannedWord.objects.filter(pk=self.word.pk).update(
+            banned_word='Злодей')
+        self.assertEqual(lexicon.get_lexicon(), {'редиска'})
+        cache.incr(lexicon.LEXICON_VERSION_KEY)
+        self.assertEqual(lexicon.get_lexicon(), {'злодей'})
+
+    def test_post_form_uses_lexicon(self):
+        """Форма поста отклоняет слова из словаря"""
+        for text in ('ты редиска', 'Ты — РЕДИСКА!', '(редиска)'):
+            with self.subTest(text=text):
+                form = PostForm(data={'text': text})
+                self.assertFalse(form.is_valid())
+                self.assertIn('text', form.errors)
+        self.assertTrue(PostForm(data={'text': 'редиски'}).is_valid())
+
+    def test_find_bad_words(self):
+        """Найденные слова и фразы возвращаются с позициями"""
+        BannedWord.objects.create(banned_word='Плохой человек',
+                                  word_type='фраза')
+        self.assertEqual(
+            find_bad_words('Редиска, плохой человек.'),
+            [(0, 7, 'редиска'), (9, 23, 'плохой человек')]
+        )
+        text = 'Ну ты р е д и с к а, и ещё ре-ди-ииска!'
+        self.assertEqual(
+            [text[start:end] for start, end, _ in find_bad_words(text)],
+            ['р е д и с к а', 'ре-ди-ииска']
+        )
+
+
+class MatcherTest(TestCase):
+    """Тестирование автомата Ахо — Корасик"""
+
+    def test_overlapping_words(self):
+        """Находятся все вхождения, в том числе вложенные"""
+        matcher = Matcher(['he', 'she', 'his', 'hers'])
+        self.assertEqual(
+            list(matcher.finditer('ushers', whole_words=False)),
+            [(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')]
+        )
+        self.assertFalse(matcher.search('ushers'))
+        self.assertTrue(matcher.search('she, his'))
+
+    def test_positions_in_original_text(self):
+        """Позиции указывают на исходный текст, даже если lower()
+        меняет его длину"""
+        text = 'İstanbul: Редиска'
+        matches = list(Matcher(['редиска']).finditer(text))
+        self.assertEqual(matches, [(10, 17, 'редиска')])
+        start, end, _ = matches[0]
+        self.assertEqual(text[start:end], 'Редиска')
+
+    def test_empty_matcher(self):
+        """Пустой словарь ничего не находит"""
+        self.assertFalse(Matcher([]).search('любой текст'))
+
+
+class NormalizeTest(TestCase):
+    """Тестирование нормализации текста"""
+
+    def test_evasive_spellings(self):
+        """Обходные написания приводятся к словарному виду"""
+        for text in (
+            'редиска', 'PEДИCKA', 'pедиииска', 'р е д и с к а',
+            'р.е.д.и.с.к.а', 'ре-ди-ска', 'ред\u200bиска', 'PeдиCKa',
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(normalize(text), normalize('редиска'))
+
+    def test_origin_matches_normalize(self):
+        """Позиции нормализованного текста указывают на исходные символы"""
+        for text in (
+            'ну ты р е д и с к а', 'PEДИCKA и ре-ди-ска', 'ред\u200bиска',
+            'İзба', 'тоооот',
+        ):
+            with self.subTest(text=text):
+                normalized, origin = normalize_with_origin(text)
+                self.assertEqual(normalized, normalize(text))
+                self.assertEqual(len(origin), len(normalized))
+                self.assertEqual(origin, sorted(origin))
+
+    def test_plain_text_kept(self):
+        """Обычный текст не склеивается"""
+        self.assertEqual(normalize('ты и я, а он'), 'ты и я, а он')
+        self.assertEqual(normalize('а и б'), 'а и б')
+
+    def test_evasive_spellings_rejected(self):
+        """Форма отклоняет обходные написания слов словаря"""
+        cache.clear()
+        BannedWord.objects.create(banned_word='Редиска', word_type='сущ.')
+        with self.assertLogs('posts.forms', 'DEBUG') as logs:
+            form = PostForm(data={'text': 'ну ты и Р.Е.Д.И.С.К.А'})
+            self.assertFalse(form.is_valid())
+        self.assertIn('Проверка на запрещенные слова', logs.output[0])
+
+
+class RescanTest(TestCase):
+    """Тестирование повторной проверки записей"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.clean = Post.objects.create(author=cls.author, text='Чистый')
+        cls.dirty = Post.objects.create(author=cls.author,
+                                        text='Ну ты и р-е-д-и-с-к-а!')
+        cls.comment = Comment.objects.create(post=cls.clean,
+                                             author=cls.author,
+                                             text='Сам РЕДИСКА')
+
+    def setUp(self):
+        cache.clear()
+        BannedWord.objects.create(banned_word='Редиска', word_type='сущ.')
+
+    def flagged(self, kind):
+        return list(ModerationFlag.objects.filter(
+            kind=kind).values_list('object_id', flat=True))
+
+    def test_rescan_flags_posts_and_comments(self):
+        """Команда отмечает посты и комментарии с запрещенными словами"""
+        out = StringIO()
+        call_command('rescan_banned_words', workers=1, chunk_size=1,
+                     stdout=out)
+        self.assertEqual(self.flagged(ModerationFlag.POST), [self.dirty.pk])
+        self.assertEqual(self.flagged(ModerationFlag.COMMENT),
+                         [self.comment.pk])
+        self.assertIn('post: проверено 2, отмечено 1', out.getvalue())
+
+    def test_rescan_in_process_pool(self):
+        """Проверка в пуле процессов дает тот же результат"""
+        rescan(ModerationFlag.POST, workers=2, chunk_size=1)
+        self.assertEqual(self.flagged(ModerationFlag.POST), [self.dirty.pk])
+
+    def test_failed_rescan_cancels_pending_chunks(self):
+        """Ошибка записи отменяет ожидающие пачки и закрывает пул"""
+        shutdown = ProcessPoolExecutor.shutdown
+        with mock.patch('obsceneLang.rescan._save',
+                        side_effect=RuntimeError), \
+                mock.patch.object(ProcessPoolExecutor, 'shutdown',
+                                  autospec=True,
+                                  side_effect=shutdown) as spy:
+            with self.assertRaises(RuntimeError):
+                rescan(ModerationFlag.POST, workers=2, chunk_size=1)
+        # Без cancel_futures: его нет до Python 3.9
+        spy.assert_called_once_with(mock.ANY)
+
+    def test_interrupted_rescan_resumes(self):
+        """Прерванная проверка продолжается с контрольной точки"""
+        RescanCheckpoint.objects.create(kind=ModerationFlag.POST,
+                                        last_id=self.dirty.pk)
+        self.assertEqual(rescan(ModerationFlag.POST, workers=1), (0, 0))
+        self.assertEqual(rescan(ModerationFlag.POST, workers=1), (2, 1))
+
+    def test_incremental_rescan(self):
+        """Инкрементальная проверка берет только новые записи"""
+        rescan(ModerationFlag.POST, workers=1)
+        new = Post.objects.create(author=self.author, text='редиска')
+        self.assertEqual(
+            rescan(ModerationFlag.POST, incremental=True, workers=1), (1, 1)
+        )
+        self.assertIn(new.pk, self.flagged(ModerationFlag.POST))
+
+
+class BulkLexiconTest(TestCase):
+    """Тестирование загрузки и выгрузки словаря"""
+
+    def setUp(self):
+        cache.clear()
+        BannedWord.objects.create(banned_word='редиска', word_type='сущ.')
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def test_import_txt(self):
+        """Из TXT добавляются только новые слова, версия меняется раз"""
+        path = self.write('words.txt', '# словарь\nНегодяй\nнегодяй\n'
+                                       'РЕДИСКА\n  злой   умысел \n'
+                                       f'{"ы" * 51}\n')
+        version = lexicon.lexicon_version()
+        out = StringIO()
+        with run_on_commit():
+            call_command('import_banned_words', path, stdout=out,
+                         stderr=StringIO())
+            self.assertEqual(lexicon.lexicon_version(), version)
+        self.assertEqual(lexicon.lexicon_version(), version + 1)
+        self.assertEqual(
+            set(BannedWord.objects.values_list('banned_word', flat=True)),
+            {'редиска', 'негодяй', 'злой умысел'}
+        )
+        self.assertIn('новых 2, уже есть 1, повторов 1, некорректных 1, '
+                      'только в таблице 0', out.getvalue())
+
+    def test_import_csv_dry_run(self):
+        """Пробная загрузка CSV ничего не записывает"""
+        path = self.write('words.csv', 'banned_word,word_type,comments\n'
+                                       'негодяй,сущ.,грубо\n')
+        call_command('import_banned_words', path, '--dry-run',
+                     stdout=StringIO())
+        self.assertFalse(
+            BannedWord.objects.filter(banned_word='негодяй').exists())
+
+    def test_export(self):
+        """Выгрузка в CSV содержит все слова"""
+        out = StringIO()
+        call_command('export_banned_words', '--csv', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(),
+                         ['banned_word,word_type,comments', 'редиска,сущ.,'])
+
+    def test_admin_import(self):
+        """Админка загружает словарь из файла"""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        changelist = self.client.get(
+            reverse('admin:obsceneLang_bannedword_changelist'))
+        self.assertContains(
+            changelist, reverse('admin:obsceneLang_bannedword_import'))
+        upload = SimpleUploadedFile('words.txt', 'негодяй\n'.encode())
+        response = self.client.post(
+            reverse('admin:obsceneLang_bannedword_import'),
+            {'file': upload, 'word_type': 'сущ.'}
+        )
+        self.assertRedirects(
+            response, reverse('admin:obsceneLang_bannedword_changelist'))
+        self.assertTrue(
+            BannedWord.objects.filter(banned_word='негодяй').exists())
+
+    def test_import_unreadable_files(self):
+        """Файл не в UTF-8 и битый CSV дают ошибку команды"""
+        path = os.path.join(self.directory, 'words.txt')
+        with open(path, 'wb') as file:
+            file.write('негодяй\n'.encode('cp1251'))
+        broken = self.write('words.csv', f'"{"ы" * 200000}"\n')
+        for path in (path, broken):
+            with self.subTest(path=path):
+                with self.assertRaises(CommandError):
+                    call_command('import_banned_words', path,
+                                 stdout=StringIO())
+
+    def test_import_csv_extension_case(self):
+        """Заголовок файла .CSV не попадает в словарь"""
+        path = self.write('WORDS.CSV', 'banned_word,word_type,comments\n'
+                                       'негодяй,сущ.,грубо\n')
+        call_command('import_banned_words', path, stdout=StringIO())
+        self.assertEqual(
+            set(BannedWord.objects.values_list('banned_word', flat=True)),
+            {'редиска', 'негодяй'}
+        )
+
+    def test_import_with_bom(self):
+        """BOM в начале файла не попадает в заголовок или слово"""
+        path = self.write('words.csv', '\ufeffbanned_word,word_type\n'
+                                       'негодяй,сущ.\n')
+        call_command('import_banned_words', path, stdout=StringIO())
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('words.txt',
+                                    '\ufeffзлодей\n'.encode())
+        self.client.post(reverse('admin:obsceneLang_bannedword_import'),
+                         {'file': upload, 'word_type': 'сущ.'})
+        self.assertEqual(
+            set(BannedWord.objects.values_list('banned_word', flat=True)),
+            {'редиска', 'негодяй', 'злодей'}
+        )
+
+    def test_export_csv_extension_case(self):
+        """Файл .CSV выгружается в формате CSV"""
+        path = os.path.join(self.directory, 'WORDS.CSV')
+        call_command('export_banned_words', path)
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual(file.read().splitlines()[0],
+                             'banned_word,word_type,comments')
+
+    def test_admin_import_unreadable_file(self):
+        """Админка показывает ошибку для файла не в UTF-8"""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('words.txt', 'негодяй\n'.encode('cp1251'))
+        response = self.client.post(
+            reverse('admin:obsceneLang_bannedword_import'),
+            {'file': upload, 'word_type': 'сущ.'}
+        )
+        self.assertContains(response, 'Не удалось прочитать файл')
+        self.assertEqual(BannedWord.objects.count(), 1)
@@ -1,20 +1,21 @@
-from typing import Set
+from typing import List
 
-from .models import BannedWord
+from .lexicon import get_matcher
+from .matcher import Match
+from .normalize import normalize, normalize_with_origin
 
 
-def get_banned_words() -> Set[str]:
-    """Получить множество нецензурных слов."""
-    bad_words = ({w.lower() for w in
-                  BannedWord.objects.values_list('banned_word', flat=True)})
-    return bad_words
+def find_bad_words(text: str) -> List[Match]:
+    """Найти нецензурные слова и фразы в тексте.
+    Начало и конец указывают на символы исходного текста.
+    """
+    normalized, origin = normalize_with_origin(text)
+    return [
+        (origin[start], origin[end - 1] + 1, word)
+        for start, end, word in get_matcher().finditer(normalized)
+    ]
 
 
-def get_words_from_text(text_string: str) -> Set[str]:
-    """Получить множество слов из текста."""
-    return {w for w in text_string.lower().split()}
-
-
-def has_bad_words(set_string: Set[str], bad_words_set: Set[str]) -> bool:
-    """Определить пересекается ли множество bad_words_set с set_string."""
-    return bool(bad_words_set & set_string)
+def contains_bad_words(text: str) -> bool:
+    """Определить есть ли в тексте нецензурные слова или фразы."""
+    return get_matcher().search(normalize(text))
@@ -8,3 +8,6 @@ class PostsConfig(AppConfig):
 
     name = 'posts'
     verbose_name = 'Посты'
+
+    def ready(self):
+        from . import holes, signals  # noqa: F401
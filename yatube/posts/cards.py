@@ -0,0 +1,34 @@
+from django.core.cache import cache
+from django.template.loader import get_template
+
+from .feed_cache import FEED_CACHE_TIMEOUT
+from .thumbnails import preload_thumbnails
+
+CARD_TEMPLATE = 'includes/post_card.html'  # Шаблон карточки поста
+
+
+def card_cache_key(post, flags):
+    """Ключ карточки: id поста, версия updated и флаги отображения."""
+    return f'post_card:{post.pk}:{post.updated.timestamp()}:{flags}'
+
+
+def render_cards(posts, **flags):
+    """HTML карточек постов в порядке posts.
+    Кэш читается одним get_many, рендерятся только промахи.
+    Миниатюры промахов ищутся в kvstore sorl одной пачкой.
+    """
+    flags_key = ','.join(f'{name}={int(bool(value))}'
+                         for name, value in sorted(flags.items()))
+    keys = {card_cache_key(post, flags_key): post for post in posts}
+    cards = cache.get_many(keys)
+    missing = {}
+    if len(cards) < len(keys):
+        template = get_template(CARD_TEMPLATE)
+        preload_thumbnails(
+            post for key, post in keys.items() if key not in cards)
+        for key, post in keys.items():
+            if key not in cards:
+                missing[key] = template.render({'post': post, **flags})
+        cache.set_many(missing, FEED_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [cards[key] for key in keys]
@@ -0,0 +1,110 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.middleware.csrf import get_token
+from django.views.decorators.http import condition
+
+from .feed_cache import (INDEX_SCOPE, SITE_SCOPE, author_scope,
+                         feed_last_modified, feed_versions, follow_scope,
+                         group_scope)
+from .models import Comment, Group, Post, TimelineEntry
+from .paginator.paginator import CURSOR_PARAM
+
+User = get_user_model()
+
+
+def _latest(request, *dates):
+    """Самая поздняя из дат. Вход пользователя тоже меняет страницу."""
+    if request.user.is_authenticated:
+        dates = (*dates, request.user.last_login)
+    return max(date for date in dates if date is not None)
+
+
+def _etag(request, *parts):
+    """ETag из частей, страницы ленты и пользователя.
+    Для вошедшего пользователя в ETag входит и секрет CSRF: после
+    повторного входа он меняется, и страница с формой не должна
+    вернуться из кэша браузера со старым токеном."""
+    page = request.GET.get('page') or request.GET.get(CURSOR_PARAM) or ''
+    parts = (*parts, page, request.user.pk)
+    if request.user.is_authenticated:
+        get_token(request)
+        parts = (*parts, request.META['CSRF_COOKIE'])
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _feed_validators(request, queryset, scopes, *counts):
+    """Валидаторы ленты: новейший pub_date, счётчики, версии и страница."""
+    scopes = (SITE_SCOPE, *scopes)
+    newest = queryset.aggregate(newest=Max('pub_date'))['newest']
+    etag = _etag(request, newest, *counts, *feed_versions(*scopes))
+    return etag, _latest(request, newest, feed_last_modified(*scopes))
+
+
+def index_validators(request):
+    return _feed_validators(request, Post.objects.all(), (INDEX_SCOPE,))
+
+
+def group_validators(request, slug):
+    group = Group.objects.filter(slug=slug).values('pk', 'posts_count')
+    group = group.first()
+    if group is None:
+        return None, None
+    return _feed_validators(
+        request, Post.objects.filter(group_id=group['pk']),
+        (group_scope(slug),), group['posts_count']
+    )
+
+
+def profile_validators(request, username):
+    author = User.objects.filter(username=username).values(
+        'pk', 'stats__posts_count', 'stats__followers_count',
+        'stats__following_count'
+    ).first()
+    if author is None:
+        return None, None
+    return _feed_validators(
+        request, Post.objects.filter(author_id=author.pop('pk')),
+        (author_scope(username),), *author.values()
+    )
+
+
+def follow_validators(request):
+    return _feed_validators(
+        request, TimelineEntry.objects.filter(user=request.user),
+        (follow_scope(request.user.pk),)
+    )
+
+
+def post_detail_validators(request, post_id):
+    """Валидаторы поста: правка, число комментариев, счётчик автора."""
+    post = Post.objects.filter(pk=post_id).values(
+        'updated', 'comments_count', 'author__stats__posts_count'
+    ).first()
+    if post is None:
+        return None, None
+    newest_comment = Comment.objects.filter(post_id=post_id).aggregate(
+        newest=Max('pub_date'))['newest']
+    etag = _etag(request, *post.values(), newest_comment)
+    return etag, _latest(request, post['updated'], newest_comment)
+
+
+def conditional_page(validators):
+    """condition() с одним вычислением валидаторов на запрос.
+    Совпавшие If-None-Match или If-Modified-Since дают 304 без
+    пагинации и рендеринга.
+    """
+    def get(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            request._page_validators = validators(request, *args, **kwargs)
+        return request._page_validators
+
+    def etag(request, *args, **kwargs):
+        return get(request, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return get(request, *args, **kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,122 @@
+from collections import Counter
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import FeedCard, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+def _shifted(field, delta):
+    """F(field) + delta, не меньше нуля: разошедшийся счётчик
+    не должен нарушать ограничение PositiveIntegerField."""
+    return Greatest(F(field) + delta, 0)
+
+
+def _count_of(model, field):
+    """Подзапрос числа строк model, ссылающихся на внешний объект.
+    Для UserStats первичный ключ совпадает с id пользователя.
+    """
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def shift_user_stats(user_id, field, delta):
+    """Сдвинуть счётчик пользователя на delta одним UPDATE.
+    Если строки счётчиков ещё нет, она пересчитывается с нуля.
+    """
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{field: _shifted(field, delta)}
+    )
+    if not updated and delta > 0:
+        recount_user_stats(user_id)
+
+
+def shift_group_posts(group_id, delta):
+    """Сдвинуть счётчик постов группы."""
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=_shifted('posts_count', delta)
+        )
+
+
+def shift_post_comments(post_id, delta):
+    """Сдвинуть счётчик комментариев поста и его карточки."""
+    for model in (Post, FeedCard):
+        model.objects.filter(pk=post_id).update(
+            comments_count=_shifted('comments_count', delta)
+        )
+
+
+def count_bulk_created(posts):
+    """Учесть в счётчиках посты, созданные через bulk_create."""
+    for author_id, total in Counter(p.author_id for p in posts).items():
+        shift_user_stats(author_id, 'posts_count', total)
+    for group_id, total in Counter(p.group_id for p in posts).items():
+        shift_group_posts(group_id, total)
+
+
+def recount_user_stats(user_id):
+    """Пересчитать счётчики одного пользователя."""
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id).count(),
+        }
+    )
+    return stats
+
+
+def user_stats(user):
+    """Счётчики пользователя. Отсутствующая строка создаётся."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        user.stats = recount_user_stats(user.pk)
+        return user.stats
+
+
+def recount_all(apps=global_apps):
+    """Пересчитать все счётчики пакетными UPDATE с подзапросами.
+    apps - реестр моделей: миграция передаёт исторический.
+    """
+    stats_model = apps.get_model('posts', 'UserStats')
+    post_model = apps.get_model('posts', 'Post')
+    follow_model = apps.get_model('posts', 'Follow')
+    comment_model = apps.get_model('posts', 'Comment')
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    stats_model.objects.bulk_create(
+        (stats_model(user_id=pk) for pk in user_model.objects.filter(
+            stats__isnull=True).values_list('pk', flat=True)),
+        ignore_conflicts=True
+    )
+    users = stats_model.objects.update(
+        posts_count=_count_of(post_model, 'author'),
+        followers_count=_count_of(follow_model, 'author'),
+        following_count=_count_of(follow_model, 'user'),
+    )
+    groups = apps.get_model('posts', 'Group').objects.update(
+        posts_count=_count_of(post_model, 'group'))
+    posts = post_model.objects.update(
+        comments_count=_count_of(comment_model, 'post'))
+    try:
+        card_model = apps.get_model('posts', 'FeedCard')
+    except LookupError:
+        # Карточек ещё нет в ранних миграциях
+        return users, groups, posts
+    card_model.objects.update(comments_count=_count_of(comment_model, 'post'))
+    return users, groups, posts
@@ -0,0 +1,93 @@
+from time import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+FEED_CACHE_TIMEOUT = 60 * 60 * 24  # Время жизни фрагмента ленты, сек
+SITE_SCOPE = 'site'  # Версия всего сайта: переименования групп и авторов
+INDEX_SCOPE = 'index'  # Версия главной ленты
+
+
+def group_scope(slug):
+    """Область версии ленты группы."""
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    """Область версии ленты автора."""
+    return f'author:{username}'
+
+
+def follow_scope(user_id):
+    """Область версии ленты подписок пользователя."""
+    return f'follow:{user_id}'
+
+
+def _version_key(scope):
+    return f'feed_version:{scope}'
+
+
+def _modified_key(scope):
+    return f'feed_modified:{scope}'
+
+
+def _new_version():
+    """Начальная версия. Зависит от времени, чтобы после вытеснения
+    ключа версии из кэша не вернуться к уже использованному значению."""
+    return int(time() * 1000)
+
+
+def feed_versions(*scopes):
+    """Текущие версии областей. Отсутствующие версии создаются."""
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def feed_last_modified(*scopes):
+    """Время последнего изменения областей.
+    Для неизвестных областей отсчёт начинается с текущего момента.
+    """
+    keys = [_modified_key(scope) for scope in scopes]
+    modified = cache.get_many(keys)
+    missing = {key: timezone.now() for key in keys if key not in modified}
+    if missing:
+        cache.set_many(missing, None)
+        modified.update(missing)
+    return max(modified.values())
+
+
+def bump_feed_versions(*scopes):
+    """Увеличить версии областей, сбрасывая связанные фрагменты."""
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+    now = timezone.now()
+    cache.set_many({_modified_key(scope): now for scope in scopes}, None)
+
+
+def bump_feed_versions_on_commit(*scopes):
+    """Увеличить версии областей после фиксации транзакции.
+    До неё читатель может взять новую версию со старыми данными
+    и закэшировать устаревший фрагмент под новым ключом."""
+    transaction.on_commit(lambda: bump_feed_versions(*scopes))
+
+
+def feed_cache_key(page_obj, *scopes):
+    """Ключ фрагмента ленты: области с их версиями и номер страницы.
+    В курсорном режиме вместо номера используется курсор.
+    """
+    scopes = (SITE_SCOPE, *scopes)
+    versions = feed_versions(*scopes)
+    page = getattr(page_obj, 'cursor', None) or page_obj.number
+    return '|'.join(
+        f'{scope}={version}' for scope, version in zip(scopes, versions)
+    ) + f'|page={page}'
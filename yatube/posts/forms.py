@@ -1,10 +1,35 @@
+import logging
+from time import perf_counter
+
+from django.core.files.uploadedfile import (TemporaryUploadedFile,
+                                            UploadedFile)
 from django.forms import ModelForm, ValidationError
 
-from obsceneLang.utils import (get_banned_words, get_words_from_text,
-                               has_bad_words)
+from obsceneLang.utils import contains_bad_words
 
+from .ingest import normalize_image
 from .models import Comment, Post
 
+logger = logging.getLogger(__name__)
+BAD_WORDS_MESSAGE = (
+    "Использование запрещенных слов не допустимо. "
+    "Ну и ну вы разочаровали партию. "
+    "-10000 социального рейтинга."
+)
+
+
+def clean_bad_words(data):
+    """Отклонить текст с нецензурными словами.
+    Время нормализации и поиска пишется в журнал.
+    """
+    started = perf_counter()
+    found = contains_bad_words(data)
+    logger.debug('Проверка на запрещенные слова: %d символов, %.2f мс',
+                 len(data), (perf_counter() - started) * 1000)
+    if found:
+        raise ValidationError(BAD_WORDS_MESSAGE)
+    return data
+
 
 class PostForm(ModelForm):
     """PostForm
@@ -23,15 +48,25 @@ class PostForm(ModelForm):
 
     def clean_text(self):
         """Валидация формы."""
-        data = self.cleaned_data['text']
-        text = get_words_from_text(data)
-        if has_bad_words(text, get_banned_words()):
-            raise ValidationError(
-                "Использование запрещенных слов не допустимо. "
-                "Ну и ну вы разочаровали партию. "
-                "-10000 социального рейтинга."
-            )
-        return data
+        return clean_bad_words(self.cleaned_data['text'])
+
+    def clean_image(self):
+        """Новая картинка проверяется по заголовку и сохраняется
+        уменьшенной и без метаданных. Поле ImageField до этого
+        читает только заголовок и контрольные суммы, не пиксели."""
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return normalize_image(image)
+        return image
+
+    def save(self, commit=True):
+        """Временный файл картинки закрывается сразу после сохранения:
+        хранилище переносит его, а не копирует."""
+        post = super().save(commit)
+        image = self.cleaned_data.get('image')
+        if commit and isinstance(image, TemporaryUploadedFile):
+            image.close()
+        return post
 
 
 class CommentForm(ModelForm):
@@ -44,3 +79,7 @@ class CommentForm(ModelForm):
         model = Comment
         fields = ('text',)
         help_texts = {'text': 'Текст комментария'}
+
+    def clean_text(self):
+        """Валидация формы."""
+        return clean_bad_words(self.cleaned_data['text'])
@@ -0,0 +1,12 @@
+from core.holes import hole_provider
+
+from .models import Follow
+
+
+@hole_provider('posts/includes/follow_button.html')
+def follow_button(request, username):
+    """Подписан ли текущий пользователь на автора."""
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author__username=username
+    ).exists()
+    return {'following': following}
@@ -0,0 +1,122 @@
+import base64
+import os
+import warnings
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import Image, ImageOps
+
+MAX_SOURCE_SIDE = 12000  # Наибольшая сторона загружаемой картинки, px
+MAX_SOURCE_PIXELS = 24_000_000  # Наибольшая площадь до декодирования, px
+MAX_STORED_SIDE = 2560  # Наибольшая сторона сохраняемого оригинала, px
+JPEG_QUALITY = 90
+PLACEHOLDER_SIDE = 16  # Наибольшая сторона заглушки картинки, px
+ORIENTATION = 0x0112  # Тег EXIF с ориентацией снимка
+ROTATED = (5, 6, 7, 8)  # Ориентации, меняющие ширину и высоту местами
+FORMATS = {
+    'JPEG': ('.jpg', 'image/jpeg'),
+    'PNG': ('.png', 'image/png'),
+    'GIF': ('.gif', 'image/gif'),
+    'WEBP': ('.webp', 'image/webp'),
+}
+TOO_LARGE_MESSAGE = (
+    'Картинка слишком большая: %(width)d×%(height)d. '
+    'Допустимо не больше %(side)d px по стороне и %(megapixels)d Мп.'
+)
+BOMB_MESSAGE = 'Картинка слишком большая.'
+FORMAT_MESSAGE = 'Поддерживаются картинки JPEG, PNG, GIF и WebP.'
+
+
+def _open(file):
+    """Открыть картинку, прочитав только заголовок.
+    Предупреждение Pillow о бомбе распаковки считается ошибкой."""
+    if hasattr(file, 'temporary_file_path'):
+        file = file.temporary_file_path()
+    else:
+        file.seek(0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        return Image.open(file)
+
+
+def check_header(file):
+    """Проверить формат и размеры картинки по заголовку, не декодируя
+    пиксели. Возвращает (формат, ширина, высота)."""
+    try:
+        with _open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except (Image.DecompressionBombWarning,
+            Image.DecompressionBombError):
+        raise ValidationError(BOMB_MESSAGE, code='too_large')
+    except Exception:
+        raise ValidationError(FORMAT_MESSAGE, code='invalid_image')
+    if image_format not in FORMATS:
+        raise ValidationError(FORMAT_MESSAGE, code='invalid_image')
+    if (max(width, height) > MAX_SOURCE_SIDE
+            or width * height > MAX_SOURCE_PIXELS):
+        raise ValidationError(TOO_LARGE_MESSAGE, code='too_large', params={
+            'width': width, 'height': height, 'side': MAX_SOURCE_SIDE,
+            'megapixels': MAX_SOURCE_PIXELS // 1_000_000,
+        })
+    return image_format, width, height
+
+
+def _prepare(image, image_format):
+    """Режим пикселей, который можно записать в формат image_format."""
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        return image.convert('RGB')
+    if image_format in ('PNG', 'WEBP') and image.mode not in (
+            'RGB', 'RGBA', 'L', 'LA', 'P'):
+        return image.convert('RGBA')
+    return image
+
+
+def normalize_image(file):
+    """Сохранить картинку во временный файл без метаданных,
+    с применённой ориентацией EXIF и не больше MAX_STORED_SIDE.
+    JPEG декодируется сразу в уменьшенном масштабе (draft), поэтому
+    в памяти не бывает больше одной картинки ограниченного размера.
+    У GIF сохраняется только первый кадр.
+    """
+    image_format, _, _ = check_header(file)
+    extension, content_type = FORMATS[image_format]
+    with _open(file) as image:
+        if image_format == 'JPEG':
+            image.draft('RGB', (MAX_STORED_SIDE, MAX_STORED_SIDE))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((MAX_STORED_SIDE, MAX_STORED_SIDE), Image.LANCZOS)
+        image = _prepare(image, image_format)
+    image.info = {key: value for key, value in image.info.items()
+                  if key == 'transparency'}
+    name = os.path.splitext(os.path.basename(file.name))[0] + extension
+    normalized = TemporaryUploadedFile(name, content_type, 0, None)
+    options = {'quality': JPEG_QUALITY, 'optimize': True} if (
+        image_format == 'JPEG') else {}
+    image.save(normalized.file, image_format, **options)
+    normalized.size = normalized.file.tell()
+    normalized.file.seek(0)
+    return normalized
+
+
+def describe_image(file):
+    """Размеры картинки с учётом ориентации EXIF и заглушка -
+    PNG не больше PLACEHOLDER_SIDE в data URI. Для файла, который
+    не читается как картинка, возвращается (None, None, '')."""
+    try:
+        with _open(file) as image:
+            width, height = image.size
+            if image.getexif().get(ORIENTATION) in ROTATED:
+                width, height = height, width
+            image.draft('RGB', (PLACEHOLDER_SIDE, PLACEHOLDER_SIDE))
+            image.thumbnail((PLACEHOLDER_SIDE, PLACEHOLDER_SIDE))
+            image = ImageOps.exif_transpose(image).convert('RGB')
+    except Exception:
+        return None, None, ''
+    finally:
+        if hasattr(file, 'seek'):
+            file.seek(0)
+    buffer = BytesIO()
+    image.save(buffer, 'PNG', optimize=True)
+    data = base64.b64encode(buffer.getvalue()).decode()
+    return width, height, f'data:image/png;base64,{data}'
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Post
+from posts.read_model import CARD_BATCH_SIZE, check_cards, sync_cards
+
+
+class Command(BaseCommand):
+    """Сверка карточек ленты с исходными таблицами."""
+
+    help = 'Сверяет карточки ленты с постами, авторами и группами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int,
+                            default=CARD_BATCH_SIZE,
+                            help='Постов в одной пачке')
+        parser.add_argument('--fix', action='store_true',
+                            help='Пересобрать расходящиеся карточки')
+
+    def handle(self, *args, **options):
+        differences = check_cards(options['chunk_size'])
+        for post_id, fields in differences:
+            self.stdout.write(f'Пост {post_id}: {fields}')
+        if not differences:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        if options['fix']:
+            fixed = sync_cards(Post.objects.filter(
+                pk__in=[post_id for post_id, _ in differences]))
+            self.stdout.write(self.style.SUCCESS(
+                f'Пересобрано карточек: {fixed}'))
+            return
+        raise CommandError(f'Расхождений: {len(differences)}')
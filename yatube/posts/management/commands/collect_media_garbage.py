@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.media import GC_MIN_AGE, MEDIA_BATCH_SIZE, collect_garbage
+
+
+class Command(BaseCommand):
+    """Удаление картинок, миниатюр и вариантов, на которые нет ссылок."""
+
+    help = ('Находит в медиа файлы без ссылок из постов и kvstore sorl '
+            'и удаляет их или переносит в карантин')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать, ничего не удалять')
+        parser.add_argument('--quarantine',
+                            help='Каталог, куда переносить файлы '
+                                 'вместо удаления')
+        parser.add_argument('--batch-size', type=int,
+                            default=MEDIA_BATCH_SIZE,
+                            help='Файлов в одной пачке удаления')
+        parser.add_argument('--min-age', type=int, default=GC_MIN_AGE,
+                            help='Не трогать файлы моложе, сек')
+
+    def handle(self, *args, **options):
+        report = collect_garbage(
+            settings.MEDIA_ROOT, batch_size=options['batch_size'],
+            dry_run=options['dry_run'], quarantine=options['quarantine'],
+            min_age=options['min_age'])
+        prefix = 'Пробный запуск: ' if options['dry_run'] else 'Медиа: '
+        self.stdout.write(self.style.SUCCESS(f'{prefix}{report}'))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.feed_cache import SITE_SCOPE, bump_feed_versions
+from posts.ingest import describe_image
+from posts.models import IMAGE_FIELDS, FeedCard, Post
+
+DESCRIBE_BATCH_SIZE = 200  # Постов в одной пачке
+# Поля, которые пишет команда: новая версия updated сбрасывает кэш карточек
+UPDATE_FIELDS = (*IMAGE_FIELDS, 'updated')
+
+
+class Command(BaseCommand):
+    """Заполнение размеров и заглушек картинок, загруженных до них."""
+
+    help = 'Вычисляет размеры и заглушки картинок постов, где их нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int,
+                            default=DESCRIBE_BATCH_SIZE,
+                            help='Постов в одной пачке')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').filter(
+            image_width__isnull=True).order_by('pk').only('id', 'image')
+        storage = Post.image.field.storage
+        total = 0
+        failed = 0
+        last_id = 0
+        while True:
+            chunk = list(posts.filter(
+                pk__gt=last_id)[:options['chunk_size']])
+            if not chunk:
+                break
+            described = []
+            for post in chunk:
+                if storage.exists(post.image.name):
+                    with storage.open(post.image.name) as file:
+                        (post.image_width, post.image_height,
+                         post.image_placeholder) = describe_image(file)
+                if post.image_width is None:
+                    failed += 1
+                    continue
+                post.updated = timezone.now()
+                described.append(post)
+            Post.objects.bulk_update(described, UPDATE_FIELDS)
+            FeedCard.objects.bulk_update(
+                [FeedCard(post_id=post.pk,
+                          **{field: getattr(post, field)
+                             for field in UPDATE_FIELDS})
+                 for post in described],
+                UPDATE_FIELDS)
+            total += len(described)
+            last_id = chunk[-1].pk
+        if total:
+            bump_feed_versions(SITE_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {total}, не прочитано: {failed}'))
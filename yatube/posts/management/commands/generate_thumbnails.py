@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.feed_cache import SITE_SCOPE, bump_feed_versions
+from posts.models import FeedCard, Post
+from posts.thumbnails import (THUMBNAIL_SIZES, generate_thumbnails,
+                              ready_thumbnail)
+from posts.variants import get_manifest
+
+
+class Command(BaseCommand):
+    """Создание миниатюр и вариантов для ранее загруженных картинок."""
+
+    help = 'Создаёт недостающие миниатюры и варианты картинок постов'
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True).distinct().iterator()
+        total = 0
+        for name in names:
+            if get_manifest(name) and all(
+                    ready_thumbnail(name, size) for size in THUMBNAIL_SIZES):
+                continue
+            if generate_thumbnails(name):
+                now = timezone.now()
+                Post.objects.filter(image=name).update(updated=now)
+                FeedCard.objects.filter(image=name).update(updated=now)
+                total += 1
+        if total:
+            bump_feed_versions(SITE_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок с новыми миниатюрами: {total}'))
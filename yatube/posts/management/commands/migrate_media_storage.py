@@ -0,0 +1,38 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from posts.media import MEDIA_BATCH_SIZE, migrate_legacy_files
+
+
+class Command(BaseCommand):
+    """Перенос картинок постов в хранилище по хешу содержимого."""
+
+    help = ('Переносит картинки постов в каталоги по хешу содержимого '
+            'и переписывает пути в постах пачками')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=MEDIA_BATCH_SIZE,
+                            help='Имён картинок в одной пачке')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать, ничего не менять')
+        parser.add_argument('--no-thumbnails', action='store_true',
+                            help='Не создавать миниатюры перенесённых '
+                                 'картинок')
+
+    def handle(self, *args, **options):
+        report = migrate_legacy_files(options['batch_size'],
+                                      options['dry_run'])
+        for name in report.missing:
+            self.stderr.write(f'Нет файла: {name}')
+        self.stdout.write(self.style.SUCCESS(f'Картинки: {report}'))
+        if options['dry_run'] or not report.posts:
+            return
+        # Миниатюры и варианты привязаны к имени картинки: у перенесённых
+        # их нет, и до генерации ленты показывают оригиналы
+        if options['no_thumbnails']:
+            self.stdout.write('Миниатюр у перенесённых картинок нет: '
+                              'запустите generate_thumbnails')
+            return
+        call_command('generate_thumbnails', stdout=self.stdout,
+                     stderr=self.stderr)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.read_model import CARD_BATCH_SIZE, rebuild_cards
+
+
+class Command(BaseCommand):
+    """Пересборка карточек ленты с нуля."""
+
+    help = 'Пересобирает карточки ленты по таблицам постов, авторов и групп'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int,
+                            default=CARD_BATCH_SIZE,
+                            help='Постов в одной пачке')
+
+    def handle(self, *args, **options):
+        total = rebuild_cards(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано карточек: {total}'))
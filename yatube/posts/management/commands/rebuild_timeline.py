@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.timeline import rebuild_inbox
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Пересборка лент подписок с нуля."""
+
+    help = 'Пересобирает ленты подписок указанных пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*',
+                            help='Имена пользователей')
+        parser.add_argument('--all', action='store_true',
+                            help='Пересобрать ленты всех пользователей')
+
+    def handle(self, *args, **options):
+        usernames = options['usernames']
+        if options['all']:
+            users = User.objects.all()
+        elif usernames:
+            users = User.objects.filter(username__in=usernames)
+            missing = set(usernames) - set(
+                users.values_list('username', flat=True)
+            )
+            if missing:
+                raise CommandError(
+                    f'Пользователи не найдены: {", ".join(sorted(missing))}'
+                )
+        else:
+            raise CommandError('Укажите пользователей или --all')
+        rebuilt = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            rebuild_inbox(user_id)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'Пересобрано лент: {rebuilt}'))
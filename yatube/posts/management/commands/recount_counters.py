@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_all
+
+
+class Command(BaseCommand):
+    """Пересчёт денормализованных счётчиков."""
+
+    help = 'Пересчитывает счётчики постов, комментариев и подписок'
+
+    def handle(self, *args, **options):
+        users, groups, posts = recount_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано: пользователей {users}, групп {groups}, '
+            f'постов {posts}'
+        ))
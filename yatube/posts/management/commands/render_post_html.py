@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import FeedCard, Post, render_text_html
+
+RENDER_BATCH_SIZE = 500  # Постов в одной пачке
+
+
+class Command(BaseCommand):
+    """Заполнение HTML текста постов, сохранённых без него."""
+
+    help = 'Вычисляет HTML текста постов, у которых он не заполнен'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересчитать HTML всех постов')
+        parser.add_argument('--chunk-size', type=int,
+                            default=RENDER_BATCH_SIZE,
+                            help='Постов в одной пачке')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if not options['all']:
+            posts = posts.filter(text_html='')
+        posts = posts.order_by('pk').only('id', 'text')
+        total = 0
+        last_id = 0
+        while True:
+            chunk = list(posts.filter(
+                pk__gt=last_id)[:options['chunk_size']])
+            if not chunk:
+                break
+            cards = []
+            for post in chunk:
+                post.text_html = render_text_html(post.text)
+                cards.append(FeedCard(post_id=post.pk,
+                                      text_html=post.text_html))
+            Post.objects.bulk_update(chunk, ('text_html',))
+            FeedCard.objects.bulk_update(cards, ('text_html',))
+            total += len(chunk)
+            last_id = chunk[-1].pk
+        self.stdout.write(self.style.SUCCESS(f'Обработано постов: {total}'))
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Value, When
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from .feed_cache import SITE_SCOPE, bump_feed_versions
+from .models import FeedCard, Post, StoredFile
+from .storage import HASHED_NAME, content_hash, hashed_name
+from .variants import VARIANT_IDENTITY, VARIANT_PREFIX, source_file
+
+MEDIA_BATCH_SIZE = 500  # Имён картинок в одной пачке
+GC_MIN_AGE = 60 * 60  # Файлы моложе этого, сек, не трогаются: идёт загрузка
+
+
+class MediaReport:
+    """Итоги обработки файлов медиа."""
+
+    def __init__(self):
+        self.moved = 0  # Перенесено по новому имени
+        self.duplicates = 0  # Совпали с уже перенесённым файлом
+        self.missing = []  # Нет файла на диске
+        self.posts = 0  # Постов с переписанным путём
+
+    def __str__(self):
+        return (
+            f'перенесено {self.moved}, дубликатов {self.duplicates}, '
+            f'нет на диске {len(self.missing)}, постов {self.posts}'
+        )
+
+
+def _legacy_names(batch_size):
+    """Пачки имён картинок, сохранённых до хранилища по хешу,
+    с числом ссылающихся постов."""
+    posts = Post.objects.exclude(image='').exclude(
+        image__regex=HASHED_NAME.pattern).order_by('image')
+    last = ''
+    while True:
+        batch = list(posts.filter(image__gt=last).values('image').annotate(
+            refs=Count('id')).values_list('image', 'refs')[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1][0]
+
+
+def _link(source, target):
+    """Второе имя файла: жёсткая ссылка или копия."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def migrate_legacy_files(batch_size=MEDIA_BATCH_SIZE, dry_run=False):
+    """Перенести картинки постов в хранилище по хешу содержимого.
+    Файл получает второе имя, пути постов и карточек переписываются
+    пачкой одним UPDATE, и только после фиксации старое имя удаляется.
+    Прерванный перенос можно запустить повторно.
+    """
+    storage = Post.image.field.storage
+    report = MediaReport()
+    for batch in _legacy_names(batch_size):
+        renames = {}
+        refs = {}
+        for name, count in batch:
+            if not storage.exists(name):
+                report.missing.append(name)
+                continue
+            with storage.open(name) as file:
+                new_name = hashed_name(name, content_hash(file))
+            if storage.exists(new_name):
+                report.duplicates += 1
+            else:
+                report.moved += 1
+                if not dry_run:
+                    _link(storage.path(name), storage.path(new_name))
+            renames[name] = new_name
+            refs[new_name] = refs.get(new_name, 0) + count
+            report.posts += count
+        if dry_run or not renames:
+            continue
+        path = Case(*(When(image=old, then=Value(new))
+                      for old, new in renames.items()),
+                    output_field=CharField())
+        now = timezone.now()
+        with transaction.atomic():
+            Post.objects.filter(image__in=renames).update(
+                image=path, updated=now)
+            FeedCard.objects.filter(image__in=renames).update(
+                image=path, updated=now)
+            for name, count in refs.items():
+                storage.acquire(name, count)
+        for name in renames:
+            os.remove(storage.path(name))
+    if report.posts and not dry_run:
+        bump_feed_versions(SITE_SCOPE)
+    return report
+
+
+class NameSet:
+    """Множество имён в виде коротких дайджестов: на миллион
+    файлов уходят десятки мегабайт, а не сотни."""
+
+    def __init__(self, names=()):
+        self._digests = set()
+        for name in names:
+            self.add(name)
+
+    @staticmethod
+    def _digest(name):
+        return hashlib.blake2b(name.encode(), digest_size=12).digest()
+
+    def add(self, name):
+        self._digests.add(self._digest(name))
+
+    def __contains__(self, name):
+        return self._digest(name) in self._digests
+
+    def __len__(self):
+        return len(self._digests)
+
+
+def _scan(root, directory):
+    """Файлы каталога directory в медиа рекурсивно через os.scandir:
+    (имя относительно root, DirEntry) без построения списка дерева."""
+    try:
+        entries = os.scandir(os.path.join(root, directory))
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            name = f'{directory}/{entry.name}'
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan(root, name)
+            elif entry.is_file(follow_symlinks=False):
+                yield name, entry
+
+
+def live_media():
+    """Имена используемых файлов: картинки постов и файлы со ссылками
+    в StoredFile (загрузка, пост которой ещё не сохранён), миниатюры
+    этих картинок по записям kvstore sorl; ключи картинок -
+    по ним живы каталоги вариантов."""
+    images = NameSet()
+    sources = NameSet()
+    names = Post.objects.exclude(image='').values_list(
+        'image', flat=True).iterator()
+    stored = StoredFile.objects.filter(refs__gt=0).values_list(
+        'name', flat=True).iterator()
+    for name in chain(names, stored):
+        images.add(name)
+        sources.add(source_file(name).key)
+    thumbnail_keys = NameSet()
+    lists = KVStore.objects.filter(
+        key__startswith=add_prefix('', 'thumbnails')
+    ).values_list('key', 'value').iterator()
+    for key, value in lists:
+        if key.rsplit('||', 1)[-1] in sources:
+            for thumbnail_key in json.loads(value):
+                thumbnail_keys.add(thumbnail_key)
+    thumbnails = NameSet()
+    files = KVStore.objects.filter(
+        key__startswith=add_prefix('', 'image')
+    ).values_list('key', 'value').iterator()
+    for key, value in files:
+        if key.rsplit('||', 1)[-1] in thumbnail_keys:
+            thumbnails.add(json.loads(value)['name'])
+    return images, thumbnails, sources
+
+
+class GarbageReport:
+    """Итоги сборки мусора в медиа."""
+
+    def __init__(self):
+        self.scanned = 0  # Просмотрено файлов
+        self.orphans = 0  # Файлов без ссылок
+        self.size = 0  # Их объём, байт
+        self.skipped = 0  # Слишком новые, чтобы судить
+
+    def __str__(self):
+        return (
+            f'просмотрено {self.scanned}, без ссылок {self.orphans} '
+            f'({self.size / 1024 / 1024:.1f} МБ), '
+            f'пропущено новых {self.skipped}'
+        )
+
+
+def _forget(names):
+    """Удалить из kvstore sorl записи картинок постов names:
+    саму картинку, список и записи её миниатюр и описание вариантов.
+    Имя по хешу вернётся при повторной загрузке того же файла, и
+    старые записи отдали бы адреса удалённых файлов."""
+    sources = [source_file(name).key for name in names]
+    if not sources:
+        return
+    lists = KVStore.objects.filter(key__in=[
+        add_prefix(key, 'thumbnails') for key in sources
+    ]).values_list('value', flat=True)
+    keys = [add_prefix(key, 'image')
+            for value in lists for key in json.loads(value)]
+    for key in sources:
+        keys += [add_prefix(key, 'image'), add_prefix(key, 'thumbnails'),
+                 add_prefix(key, VARIANT_IDENTITY)]
+    default.kvstore._delete_raw(*keys)
+
+
+def _remove(root, names, quarantine, image_dir):
+    """Удалить пачку файлов или перенести их в карантин
+    с сохранением путей. Картинки, на которые успели сослаться новые
+    посты или загрузки (StoredFile.refs > 0), остаются.
+    Счётчики картинок блокируются до конца транзакции: acquire того
+    же имени ждёт её фиксации и запишет файл заново.
+    """
+    with transaction.atomic():
+        names = set(names) - set(Post.objects.filter(
+            image__in=names).values_list('image', flat=True))
+        images = [name for name in names
+                  if name.startswith(f'{image_dir}/')]
+        StoredFile.objects.bulk_create(
+            (StoredFile(name=name, refs=0) for name in images),
+            ignore_conflicts=True)
+        unused = set(StoredFile.objects.select_for_update().filter(
+            name__in=images, refs=0).values_list('name', flat=True))
+        names -= set(images) - unused
+        for name in names:
+            path = os.path.join(root, name)
+            if quarantine:
+                target = os.path.join(quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        StoredFile.objects.filter(name__in=unused, refs=0).delete()
+        _forget(unused)
+
+
+def collect_garbage(root, batch_size=MEDIA_BATCH_SIZE, dry_run=False,
+                    quarantine=None, min_age=GC_MIN_AGE):
+    """Найти в медиа файлы без ссылок и удалить их пачками.
+    Просматриваются каталоги картинок постов, миниатюр sorl
+    и вариантов. Вызов с dry_run только считает.
+    """
+    images, thumbnails, sources = live_media()
+    image_dir = Post.image.field.upload_to.strip('/')
+    thumbnail_dir = sorl_settings.THUMBNAIL_PREFIX.strip('/')
+    live = {
+        image_dir: lambda name: name in images,
+        thumbnail_dir: lambda name: name in thumbnails,
+        VARIANT_PREFIX: lambda name: name.split('/')[-2] in sources,
+    }
+    report = GarbageReport()
+    deadline = time.time() - min_age
+    batch = []
+    for directory, is_live in live.items():
+        for name, entry in _scan(root, directory):
+            report.scanned += 1
+            if is_live(name):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > deadline:
+                report.skipped += 1
+                continue
+            report.orphans += 1
+            report.size += stat.st_size
+            if dry_run:
+                continue
+            batch.append(name)
+            if len(batch) >= batch_size:
+                _remove(root, batch, quarantine, image_dir)
+                batch = []
+    if batch:
+        _remove(root, batch, quarantine, image_dir)
+    return report
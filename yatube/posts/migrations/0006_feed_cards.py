@@ -0,0 +1,80 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def fill_feed_cards(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    FeedCard = apps.get_model('posts', 'FeedCard')
+    posts = Post.objects.select_related('author', 'group').order_by('pk')
+    cards = []
+    for post in posts.iterator():
+        author, group = post.author, post.group
+        cards.append(FeedCard(
+            post_id=post.pk,
+            author_id=post.author_id,
+            author_username=author.username,
+            author_name=f'{author.first_name} {author.last_name}'.strip(),
+            group_id=post.group_id,
+            group_title=group.title if group else '',
+            group_slug=group.slug if group else '',
+            text=post.text,
+            image=post.image.name or '',
+            comments_count=post.comments_count,
+            pub_date=post.pub_date,
+            updated=post.updated,
+        ))
+        if len(cards) == BATCH_SIZE:
+            FeedCard.objects.bulk_create(cards)
+            cards = []
+    FeedCard.objects.bulk_create(cards)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0005_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedCard',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='posts.Post')),
+                ('author_username', models.CharField(max_length=150, verbose_name='Имя пользователя автора')),
+                ('author_name', models.CharField(blank=True, max_length=200, verbose_name='Отображаемое имя автора')),
+                ('group_title', models.CharField(blank=True, max_length=200, verbose_name='Название группы')),
+                ('group_slug', models.SlugField(blank=True, verbose_name='Фрагмент URL группы')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('image', models.CharField(blank=True, max_length=100, verbose_name='Картинка')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='Число комментариев')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('updated', models.DateTimeField(verbose_name='Дата изменения')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group')),
+            ],
+            options={
+                'verbose_name': 'Карточка ленты',
+                'verbose_name_plural': 'Карточки ленты',
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedcard',
+            index=models.Index(fields=['-pub_date'], name='card_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedcard',
+            index=models.Index(fields=['author', '-pub_date'], name='card_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedcard',
+            index=models.Index(fields=['group', '-pub_date'], name='card_group_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_feed_cards, migrations.RunPython.noop),
+    ]
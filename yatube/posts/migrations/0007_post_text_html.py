@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_feed_cards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedcard',
+            name='text_html',
+            field=models.TextField(blank=True, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_image_placeholders'),
+    ]
+
+    # Связь без столбца: схема базы не меняется, а SQLite иначе
+    # пересоздал бы таблицу ленты целиком
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AddField(
+                model_name='timelineentry',
+                name='card',
+                field=models.ForeignObject(from_fields=('post',), on_delete=django.db.models.deletion.DO_NOTHING, related_name='timeline_entries', to='posts.FeedCard', to_fields=('post',)),
+            ),
+        ]),
+    ]
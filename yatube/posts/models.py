@@ -1,18 +1,57 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.template.defaultfilters import linebreaksbr
 
-from core.models import CreatedModel
+from core.models import AtomicSaveModel, CreatedModel
+
+from .feed_cache import SITE_SCOPE, bump_feed_versions_on_commit
+from .ingest import describe_image
+from .storage import post_image_storage
 
 MAX_LEN_TO_STR = 200  # Максимальный размер строки
+# Поля карточки поста (includes/post_card.html) для лент
+FEED_FIELDS = (
+    'id', 'text', 'text_html', 'pub_date', 'updated', 'image', 'author',
+    'group', 'comments_count', 'image_width', 'image_height',
+    'image_placeholder',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__title', 'group__slug',
+)
+# Поля, которые вычисляются по картинке поста
+IMAGE_FIELDS = ('image_width', 'image_height', 'image_placeholder')
+# Счётчики меняются только UPDATE-ами сигналов, а не сохранением модели
+COUNTER_FIELDS = ('posts_count', 'comments_count')
 User = get_user_model()
 
 
+def without_counters(instance, kwargs):
+    """Полное сохранение существующей строки превратить в сохранение
+    всех загруженных полей, кроме счётчиков: иначе устаревшее значение
+    счётчика из памяти затрёт то, что насчитали сигналы."""
+    if (kwargs.get('update_fields') is not None
+            or instance._state.adding or kwargs.get('force_insert')):
+        return kwargs
+    deferred = instance.get_deferred_fields()
+    kwargs['update_fields'] = {
+        field.attname for field in instance._meta.concrete_fields
+        if not field.primary_key and field.attname not in deferred
+        and field.attname not in COUNTER_FIELDS
+    }
+    return kwargs
+
+
+def render_text_html(text):
+    """HTML текста поста: то же, что фильтр linebreaksbr в шаблоне."""
+    return linebreaksbr(text, autoescape=True)
+
+
 class Group(models.Model):
     """Модель групп
     Атрибуты:
         title : Название
         slug : Уникальный фрагмент URL
         description : Описание
+        posts_count : Число постов группы
     """
 
     title = models.CharField('Название',
@@ -21,6 +60,8 @@ class Group(models.Model):
     slug = models.SlugField('Уникальный фрагмент URL',
                             unique=True)
     description = models.TextField('Описание')
+    posts_count = models.PositiveIntegerField('Число постов', default=0,
+                                              editable=False)
 
     class Meta:
         ordering = ('title',)
@@ -30,6 +71,32 @@ class Group(models.Model):
     def __str__(self) -> str:
         return self.title[:MAX_LEN_TO_STR]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **without_counters(self, kwargs))
+
+
+class PostQuerySet(models.QuerySet):
+    """Набор постов. Массовое создание обновляет счётчики и карточки
+    ленты и сбрасывает кэш лент."""
+
+    def feed(self):
+        """Посты для лент: автор и группа одним JOIN и только поля
+        карточки, без пароля и почты автора и описания группы."""
+        return self.select_related('author', 'group').only(*FEED_FIELDS)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .counters import count_bulk_created
+        from .read_model import sync_missing_cards
+        objs = list(objs)
+        for obj in objs:
+            obj.text_html = render_text_html(obj.text)
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            count_bulk_created(objs)
+            sync_missing_cards()
+        bump_feed_versions_on_commit(SITE_SCOPE)
+        return objs
+
 
 class Post(CreatedModel):
     """Модель постов
@@ -38,10 +105,17 @@ class Post(CreatedModel):
         pub_date : Дата публикации
         author : Автор
         group : Группа
+        comments_count : Число комментариев
+        updated : Дата изменения (версия карточки поста)
+        text_html : HTML текста, вычисляется при сохранении
+        image_width, image_height : Размеры картинки, px
+        image_placeholder : Заглушка картинки (data URI)
     """
 
     text = models.TextField('Текст',
                             help_text='Введите текст поста')
+    text_html = models.TextField('HTML текста', blank=True,
+                                 editable=False)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -60,17 +134,62 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True,
     )
+    image_width = models.PositiveIntegerField('Ширина картинки', null=True,
+                                              blank=True, editable=False)
+    image_height = models.PositiveIntegerField('Высота картинки', null=True,
+                                               blank=True, editable=False)
+    image_placeholder = models.TextField('Заглушка картинки', blank=True,
+                                         editable=False)
+    comments_count = models.PositiveIntegerField('Число комментариев',
+                                                 default=0,
+                                                 editable=False)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(name='post_pub_date_idx',
+                         fields=('-pub_date',)),
+            models.Index(name='post_author_pub_date_idx',
+                         fields=('author', '-pub_date')),
+            models.Index(name='post_group_pub_date_idx',
+                         fields=('group', '-pub_date')),
+        )
 
     def __str__(self) -> str:
         return self.text[:MAX_LEN_TO_STR]
 
+    def save(self, *args, **kwargs):
+        kwargs = without_counters(self, kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.text_html = render_text_html(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'text_html'}
+        if not self.image or not self.image._committed:
+            self.describe_image()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'],
+                                           *IMAGE_FIELDS}
+        super().save(*args, **kwargs)
+
+    def describe_image(self):
+        """Размеры и заглушка новой картинки, пока она ещё в памяти
+        или во временном файле."""
+        if not self.image:
+            self.image_width = self.image_height = None
+            self.image_placeholder = ''
+            return
+        (self.image_width, self.image_height,
+         self.image_placeholder) = describe_image(self.image.file)
+
 
 class Comment(CreatedModel):
     """Модель комментариев
@@ -100,12 +219,16 @@ class Comment(CreatedModel):
         ordering = ('-pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(name='comment_post_pub_date_idx',
+                         fields=('post', '-pub_date')),
+        )
 
     def __str__(self) -> str:
         return self.text[:MAX_LEN_TO_STR]
 
 
-class Follow(models.Model):
+class Follow(AtomicSaveModel):
     """Модель подписки
     Атрибуты:
         user : Пользователь
@@ -121,6 +244,10 @@ class Follow(models.Model):
         verbose_name = 'Подписку'
         verbose_name_plural = 'Подписки'
         get_latest_by = ('author')
+        indexes = (
+            models.Index(name='follow_author_user_idx',
+                         fields=('author', 'user')),
+        )
         constraints = (
             models.UniqueConstraint(
                 name='unique_relationships',
@@ -135,3 +262,194 @@ class Follow(models.Model):
     def __str__(self) -> str:
         return (f'{self.user[:MAX_LEN_TO_STR]} '
                 f'подписан на {self.author[:MAX_LEN_TO_STR]}')
+
+
+class UserStats(models.Model):
+    """Модель счётчиков пользователя
+    Атрибуты:
+        user : Пользователь
+        posts_count : Число постов
+        followers_count : Число подписчиков
+        following_count : Число подписок
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='stats')
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField('Число подписчиков',
+                                                  default=0)
+    following_count = models.PositiveIntegerField('Число подписок',
+                                                  default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self) -> str:
+        return f'{self.user_id}: {self.posts_count}'
+
+
+class StoredFile(models.Model):
+    """Модель счётчика ссылок на файл хранилища по хешу содержимого
+    Атрибуты:
+        name : Имя файла в хранилище
+        refs : Число ссылок на файл
+    """
+
+    name = models.CharField('Имя файла', max_length=100, primary_key=True)
+    refs = models.PositiveIntegerField('Число ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'Файл хранилища'
+        verbose_name_plural = 'Файлы хранилища'
+
+    def __str__(self) -> str:
+        return f'{self.name}: {self.refs}'
+
+
+class TimelineEntry(models.Model):
+    """Модель записи ленты подписок (входящие пользователя)
+    Атрибуты:
+        user : Владелец ленты
+        post : Пост
+        card : Карточка ленты поста
+        pub_date : Дата публикации поста (копия для сортировки)
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    # Связь без столбца: карточка поста по тому же post_id, чтобы
+    # лента карточек соединялась с записями без таблицы постов
+    card = models.ForeignObject('FeedCard', on_delete=models.DO_NOTHING,
+                                from_fields=('post',), to_fields=('post',),
+                                related_name='timeline_entries')
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = (
+            models.UniqueConstraint(
+                name='unique_timeline_entry',
+                fields=('user', 'post'),
+            ),
+        )
+        indexes = (
+            models.Index(name='timeline_user_pub_date_idx',
+                         fields=('user', '-pub_date')),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.user_id}: {self.post_id}'
+
+
+class FeedCardQuerySet(models.QuerySet):
+    """Набор карточек ленты."""
+
+    def as_posts(self):
+        """Отдавать вместо карточек посты, собранные из их полей."""
+        clone = self._chain()
+        clone._iterable_class = PostFromCardIterable
+        return clone
+
+
+class PostFromCardIterable(models.query.ModelIterable):
+    """Итератор, превращающий карточки ленты в посты."""
+
+    def __iter__(self):
+        for card in super().__iter__():
+            yield card.as_post()
+
+
+class FeedCard(models.Model):
+    """Модель карточки ленты: плоская копия поста для чтения лент
+    Атрибуты:
+        post : Пост
+        author : Автор
+        author_username : Имя пользователя автора
+        author_name : Отображаемое имя автора
+        group : Группа
+        group_title : Название группы
+        group_slug : Фрагмент URL группы
+        text : Текст
+        text_html : HTML текста
+        image : Картинка
+        image_width, image_height : Размеры картинки, px
+        image_placeholder : Заглушка картинки (data URI)
+        comments_count : Число комментариев
+        pub_date : Дата публикации
+        updated : Дата изменения (версия карточки поста)
+    """
+
+    post = models.OneToOneField(Post, on_delete=models.CASCADE,
+                                primary_key=True, related_name='card')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+')
+    author_username = models.CharField('Имя пользователя автора',
+                                       max_length=150)
+    author_name = models.CharField('Отображаемое имя автора',
+                                   max_length=MAX_LEN_TO_STR, blank=True)
+    group = models.ForeignKey(Group, on_delete=models.SET_NULL,
+                              blank=True, null=True, related_name='+')
+    group_title = models.CharField('Название группы',
+                                   max_length=MAX_LEN_TO_STR, blank=True)
+    group_slug = models.SlugField('Фрагмент URL группы', blank=True)
+    text = models.TextField('Текст')
+    text_html = models.TextField('HTML текста', blank=True)
+    image = models.CharField('Картинка', max_length=100, blank=True)
+    image_width = models.PositiveIntegerField('Ширина картинки', null=True,
+                                              blank=True)
+    image_height = models.PositiveIntegerField('Высота картинки', null=True,
+                                               blank=True)
+    image_placeholder = models.TextField('Заглушка картинки', blank=True)
+    comments_count = models.PositiveIntegerField('Число комментариев',
+                                                 default=0)
+    pub_date = models.DateTimeField('Дата публикации')
+    updated = models.DateTimeField('Дата изменения')
+
+    objects = FeedCardQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Карточка ленты'
+        verbose_name_plural = 'Карточки ленты'
+        indexes = (
+            models.Index(name='card_pub_date_idx',
+                         fields=('-pub_date',)),
+            models.Index(name='card_author_pub_date_idx',
+                         fields=('author', '-pub_date')),
+            models.Index(name='card_group_pub_date_idx',
+                         fields=('group', '-pub_date')),
+        )
+
+    def __str__(self) -> str:
+        return self.text[:MAX_LEN_TO_STR]
+
+    def as_post(self):
+        """Пост из полей карточки без запросов к БД.
+        Автор и группа - экземпляры только с полями карточки.
+        """
+        post = Post(
+            id=self.post_id, text=self.text, text_html=self.text_html,
+            image=self.image, image_width=self.image_width,
+            image_height=self.image_height,
+            image_placeholder=self.image_placeholder,
+            author_id=self.author_id, group_id=self.group_id,
+            comments_count=self.comments_count, pub_date=self.pub_date,
+            updated=self.updated,
+        )
+        post._state.adding = False
+        post._state.db = self._state.db
+        post.author = User(id=self.author_id,
+                           username=self.author_username,
+                           first_name=self.author_name)
+        post.author._state.adding = False
+        if self.group_id is not None:
+            post.group = Group(id=self.group_id, title=self.group_title,
+                               slug=self.group_slug)
+            post.group._state.adding = False
+        return post
@@ -0,0 +1,133 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from core.holes import fill_holes
+
+from .feed_cache import SITE_SCOPE, feed_versions
+
+CACHEABLE_METHODS = ('GET', 'HEAD')
+
+
+def page_cache_key(request, scopes):
+    """Ключ каркаса страницы: путь с параметрами и версии лент."""
+    scopes = (SITE_SCOPE, *scopes)
+    versions = '.'.join(str(version) for version in feed_versions(*scopes))
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{path}:{versions}'
+
+
+def anonymous_key(key):
+    """Ключ готовой страницы для анонимного пользователя."""
+    return f'{key}:anonymous'
+
+
+def _cached(response, content):
+    """Тело и заголовки ответа для кэша."""
+    return {'content': content, 'headers': list(response.items())}
+
+
+def _restored(cached):
+    """Ответ из кэша с сохранёнными заголовками."""
+    response = HttpResponse(cached['content'])
+    for header, value in cached['headers']:
+        response[header] = value
+    return response
+
+
+def cache_page_with_holes(scopes):
+    """Кэш страницы с поздним рендерингом пользовательских дырок.
+    scopes(**kwargs) - области версий лент, от которых зависит страница.
+    Каркас страницы общий для всех, дырки заполняются для каждого
+    запроса. Каркас хранится вместе с заголовками ответа представления.
+    Анонимную страницу целиком кэширует и отдаёт
+    AnonymousPageCacheMiddleware.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (not settings.PAGE_CACHE_ENABLED
+                    or request.method not in CACHEABLE_METHODS):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request, scopes(**kwargs))
+            cached = cache.get(key)
+            if cached is None:
+                request.punch_holes = True
+                try:
+                    response = view(request, *args, **kwargs)
+                finally:
+                    request.punch_holes = False
+                if response.status_code != 200 or response.streaming:
+                    return response
+                skeleton = response.content.decode(response.charset)
+                cache.set(key, _cached(response, skeleton),
+                          settings.PAGE_CACHE_TIMEOUT)
+            else:
+                response = _restored(cached)
+                skeleton = cached['content']
+            response.content = fill_holes(request, skeleton)
+            if not request.user.is_authenticated:
+                request.anonymous_page_key = anonymous_key(key)
+            return response
+        wrapper.page_cache_scopes = scopes
+        return wrapper
+    return decorator
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдача готовых анонимных страниц из кэша.
+    Стоит до SessionMiddleware: запрос без cookie сессии получает
+    страницу, не проходя сессии, аутентификацию и представление.
+    Страница кэшируется на выходе, когда заголовки уже добавлены
+    всеми внутренними middleware и декораторами; ответы с cookie
+    не кэшируются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.cached_response(request)
+        if response is None:
+            response = self.get_response(request)
+            self.store(request, response)
+        return response
+
+    @staticmethod
+    def store(request, response):
+        key = getattr(request, 'anonymous_page_key', None)
+        if (key is None or response.status_code != 200
+                or response.streaming or response.cookies):
+            return
+        cache.set(key, _cached(response, response.content),
+                  settings.PAGE_CACHE_TIMEOUT)
+
+    def cached_response(self, request):
+        if (not settings.PAGE_CACHE_ENABLED
+                or request.method not in CACHEABLE_METHODS
+                or settings.SESSION_COOKIE_NAME in request.COOKIES):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        scopes = getattr(match.func, 'page_cache_scopes', None)
+        if scopes is None:
+            return None
+        cached = cache.get(anonymous_key(
+            page_cache_key(request, scopes(**match.kwargs))
+        ))
+        if cached is None:
+            return None
+        response = _restored(cached)
+        return get_conditional_response(
+            request, etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified')),
+            response=response)
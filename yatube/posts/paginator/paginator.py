@@ -1,9 +1,232 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
 
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
-def custom_paginator(request, post_list, DEFAULT_POSTS_NUMBER=10):
-    """Функция, реализующая Пагинатор"""
-    paginator = Paginator(post_list, DEFAULT_POSTS_NUMBER)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+CURSOR_PARAM = 'cursor'  # GET-параметр курсора
+CURSOR_FORWARD = 'n'  # Направление: следующая страница
+CURSOR_BACKWARD = 'p'  # Направление: предыдущая страница
+PAGE_WINDOW_SIDE = 2  # Соседних страниц по каждую сторону от текущей
+PAGE_WINDOW_ENDS = 1  # Страниц в начале и в конце окна
+ELLIPSIS = (None, None)  # Пропуск в окне страниц
+
+
+def encode_cursor(direction, obj, number=None):
+    """Упаковать ключ (pub_date, pk) объекта в непрозрачный курсор.
+    number - номер страницы, на которую ведёт курсор, если известен.
+    """
+    raw = f'{direction}|{obj.pub_date.isoformat()}|{obj.pk}|{number or ""}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковать курсор в (направление, pub_date, pk, номер).
+    Для битого курсора возвращается None, неизвестный номер - None.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, pub_date, pk, *number = raw.decode().split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+        number = int(number[0]) if number and number[0] else None
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (CURSOR_FORWARD, CURSOR_BACKWARD) or not pub_date:
+        return None
+    if number is not None and number < 1:
+        number = None
+    return direction, pub_date, pk, number
+
+
+class CursorPaginator:
+    """Пагинатор по ключу (pub_date, pk).
+    Не выполняет COUNT(*) и OFFSET: каждая страница выбирается
+    запросом limit + 1 строк после курсора.
+    """
+
+    is_cursor = True
+    page_range = range(0)
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def page(self, cursor):
+        """Вернуть страницу, начинающуюся после курсора."""
+        key = decode_cursor(cursor)
+        if key is None:
+            return self._first_page()
+        direction, pub_date, pk, number = key
+        if direction == CURSOR_FORWARD:
+            rows = list(self.object_list.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            ).order_by('-pub_date', '-pk')[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            return CursorPage(rows[:self.per_page], self,
+                              has_next=has_more, has_previous=True,
+                              cursor=cursor, number=number)
+        rows = list(self.object_list.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        ).order_by('pub_date', 'pk')[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        if not has_more:
+            number = 1
+        return CursorPage(rows, self, has_next=True, has_previous=has_more,
+                          cursor=cursor, number=number)
+
+    def _first_page(self):
+        rows = list(self.object_list.order_by(
+            '-pub_date', '-pk')[:self.per_page + 1])
+        return CursorPage(rows[:self.per_page], self,
+                          has_next=len(rows) > self.per_page,
+                          has_previous=False, number=1)
+
+
+class CursorPage(Page):
+    """Страница курсорного пагинатора, совместимая с Page.
+    Навигация идёт по курсорам next_cursor и previous_cursor, cursor -
+    курсор самой страницы. Номер страницы переносится в курсоре и
+    может быть неизвестен (None), общее число страниц неизвестно всегда.
+    next_page_number и previous_page_number возвращают курсоры,
+    start_index и end_index - None, если номер страницы неизвестен.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous,
+                 cursor=None, number=None):
+        super().__init__(object_list, number, paginator)
+        self.cursor = cursor
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        if not self.object_list:
+            return '<Cursor page (empty)>'
+        return (f'<Cursor page {self.object_list[0].pk}'
+                f'..{self.object_list[-1].pk}>')
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def next_page_number(self):
+        return self.next_cursor
+
+    def previous_page_number(self):
+        return self.previous_cursor
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        if self.number is None:
+            return None
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        start = self.start_index()
+        if not start:
+            return start
+        return start + len(self.object_list) - 1
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return encode_cursor(CURSOR_FORWARD, self.object_list[-1],
+                             self.number and self.number + 1)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return encode_cursor(CURSOR_BACKWARD, self.object_list[0],
+                             self.number and self.number - 1)
+
+
+def _numbers_window(number, last, on_each_side, on_ends):
+    """Номера первых, последних и соседних с number страниц
+    с пропусками между несмежными номерами."""
+    numbers = sorted({
+        *range(1, on_ends + 1),
+        *range(number - on_each_side, number + on_each_side + 1),
+        *range(last - on_ends + 1, last + 1),
+    } & set(range(1, last + 1)))
+    window = []
+    for previous, current in zip([0] + numbers, numbers):
+        if current - previous == 2:
+            window.append(current - 1)
+        elif current - previous > 2:
+            window.append(None)
+        window.append(current)
+    return window
+
+
+def page_window(page_obj, on_each_side=PAGE_WINDOW_SIDE,
+                on_ends=PAGE_WINDOW_ENDS):
+    """Окно страниц вокруг текущей: список (номер, ссылка).
+    Пропуски обозначены ELLIPSIS. В курсорном режиме общего числа
+    страниц нет, и в окне только первая, соседние и текущая страницы.
+    """
+    number = page_obj.number
+    if not getattr(page_obj.paginator, 'is_cursor', False):
+        return [
+            ELLIPSIS if item is None else (item, f'?page={item}')
+            for item in _numbers_window(number, page_obj.paginator.num_pages,
+                                        on_each_side, on_ends)
+        ]
+    if number is None:
+        return []
+    window = []
+    if page_obj.has_previous():
+        if number > 2:
+            window.append((1, '?'))
+        if number > 3:
+            window.append(ELLIPSIS)
+        window.append(
+            (number - 1, f'?{CURSOR_PARAM}={page_obj.previous_cursor}'))
+    window.append((number, None))
+    if page_obj.has_next():
+        window.append(
+            (number + 1, f'?{CURSOR_PARAM}={page_obj.next_cursor}'))
+        window.append(ELLIPSIS)
+    return window
+
+
+def _numbered_page(object_list, per_page, number, count):
+    """Страница обычного пагинатора с числом объектов из счётчика.
+    Если счётчик пуст или страница пришла короче, чем он обещает,
+    счётчик разошёлся, и число объектов считается запросом COUNT.
+    """
+    if count and count > 0:
+        paginator = Paginator(object_list, per_page)
+        paginator.count = count
+        page_obj = paginator.get_page(number)
+        expected = page_obj.end_index() - page_obj.start_index() + 1
+        if len(page_obj.object_list) == expected:
+            return page_obj
+    return Paginator(object_list, per_page).get_page(number)
+
+
+def custom_paginator(request, post_list, DEFAULT_POSTS_NUMBER=10,
+                     cursor=False, count=None):
+    """Функция, реализующая Пагинатор.
+    При cursor=True используется курсорный режим без подсчёта строк.
+    count - заранее известное число объектов (денормализованный
+    счётчик), тогда COUNT(*) выполняется, только если счётчик пуст
+    или разошёлся с выбранной страницей.
+    """
+    if cursor:
+        paginator = CursorPaginator(post_list, DEFAULT_POSTS_NUMBER)
+        page_obj = paginator.page(request.GET.get(CURSOR_PARAM))
+    else:
+        page_obj = _numbered_page(post_list, DEFAULT_POSTS_NUMBER,
+                                  request.GET.get('page'), count)
+    page_obj.window = page_window(page_obj)
     return page_obj
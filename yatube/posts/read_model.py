@@ -0,0 +1,100 @@
+from django.db import transaction
+
+from .models import FeedCard, Post
+
+CARD_BATCH_SIZE = 500  # Постов в одной пачке пересборки и сверки
+CARD_FIELDS = (
+    'author_id', 'author_username', 'author_name', 'group_id',
+    'group_title', 'group_slug', 'text', 'text_html', 'image',
+    'image_width', 'image_height', 'image_placeholder',
+    'comments_count', 'pub_date', 'updated',
+)
+
+
+def card_from_post(post):
+    """Карточка ленты по посту с загруженными автором и группой."""
+    group = post.group
+    return FeedCard(
+        post_id=post.pk,
+        author_id=post.author_id,
+        author_username=post.author.username,
+        author_name=post.author.get_full_name(),
+        group_id=post.group_id,
+        group_title=group.title if group else '',
+        group_slug=group.slug if group else '',
+        text=post.text,
+        text_html=post.text_html,
+        image=post.image.name or '',
+        image_width=post.image_width,
+        image_height=post.image_height,
+        image_placeholder=post.image_placeholder,
+        comments_count=post.comments_count,
+        pub_date=post.pub_date,
+        updated=post.updated,
+    )
+
+
+def sync_cards(posts):
+    """Пересобрать карточки постов из набора posts."""
+    cards = [card_from_post(post) for post in posts.feed()]
+    with transaction.atomic():
+        FeedCard.objects.filter(
+            pk__in=[card.post_id for card in cards]).delete()
+        FeedCard.objects.bulk_create(cards, batch_size=CARD_BATCH_SIZE)
+    return len(cards)
+
+
+def sync_card(post):
+    """Пересобрать карточку одного поста."""
+    with transaction.atomic():
+        FeedCard.objects.filter(pk=post.pk).delete()
+        card_from_post(post).save(force_insert=True)
+
+
+def _post_chunks(posts, chunk_size):
+    """Пачки id постов по возрастанию первичного ключа."""
+    last_id = 0
+    while True:
+        ids = list(posts.filter(pk__gt=last_id).order_by('pk').values_list(
+            'pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def sync_missing_cards():
+    """Создать карточки постов, у которых их нет (после bulk_create)."""
+    return sync_cards(Post.objects.filter(card__isnull=True))
+
+
+def rebuild_cards(chunk_size=CARD_BATCH_SIZE):
+    """Пересобрать все карточки пачками."""
+    total = 0
+    for ids in _post_chunks(Post.objects.all(), chunk_size):
+        total += sync_cards(Post.objects.filter(pk__in=ids))
+    return total
+
+
+def check_cards(chunk_size=CARD_BATCH_SIZE):
+    """Сверить карточки с исходными таблицами пачками.
+    Возвращает список (id поста, расхождения), где расхождения -
+    'missing' для отсутствующей карточки или имена отличающихся полей.
+    """
+    differences = []
+    for ids in _post_chunks(Post.objects.all(), chunk_size):
+        expected = {
+            post.pk: card_from_post(post)
+            for post in Post.objects.filter(pk__in=ids).feed()
+        }
+        actual = FeedCard.objects.in_bulk(ids)
+        for pk, card in expected.items():
+            stored = actual.get(pk)
+            if stored is None:
+                differences.append((pk, 'missing'))
+                continue
+            fields = [field for field in CARD_FIELDS
+                      if getattr(card, field) != getattr(stored, field)]
+            if fields:
+                differences.append((pk, ', '.join(fields)))
+    return differences
@@ -0,0 +1,244 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .counters import (shift_group_posts, shift_post_comments,
+                       shift_user_stats)
+from .feed_cache import (INDEX_SCOPE, SITE_SCOPE, author_scope,
+                         bump_feed_versions_on_commit, follow_scope,
+                         group_scope)
+from .models import (Comment, FeedCard, Follow, Group, Post, TimelineEntry,
+                     UserStats)
+from .read_model import sync_card
+from .thumbnails import schedule_thumbnails
+from .timeline import backfill_inbox, fan_out_post, trim_inbox
+
+User = get_user_model()
+CARD_USER_FIELDS = ('username', 'first_name', 'last_name')
+CARD_GROUP_FIELDS = ('title', 'slug')
+
+
+def invalidate_post_feeds(post, *scopes):
+    """Сбросить кэш лент, в которых показан пост, после фиксации."""
+    scopes = [INDEX_SCOPE, author_scope(post.author.username), *scopes]
+    if post.group_id is not None:
+        scopes.append(group_scope(post.group.slug))
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    scopes.extend(follow_scope(user_id) for user_id in followers)
+    bump_feed_versions_on_commit(*scopes)
+
+
+def posts_scopes(posts):
+    """Области лент, в которых показаны посты posts: главная, авторы,
+    группы и ленты подписок, куда посты разосланы."""
+    posts = posts.order_by()
+    authors = posts.values_list('author__username', flat=True).distinct()
+    groups = posts.exclude(group=None).values_list(
+        'group__slug', flat=True).distinct()
+    readers = TimelineEntry.objects.filter(post__in=posts).order_by(
+    ).values_list('user_id', flat=True).distinct()
+    return [INDEX_SCOPE, *map(author_scope, authors),
+            *map(group_scope, groups), *map(follow_scope, readers)]
+
+
+def previous_values(sender, instance, fields, **kwargs):
+    """Прежние значения полей из базы или None, если сохраняется
+    новая строка или ни одно из полей не сохраняется."""
+    update_fields = kwargs.get('update_fields')
+    if instance._state.adding or (
+            update_fields is not None and not set(fields) & set(update_fields)
+    ):
+        return None
+    return sender.objects.filter(pk=instance.pk).values_list(
+        *fields).first()
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, **kwargs):
+    """Запомнить прежние имя пользователя для карточек ленты."""
+    instance._previous_names = previous_values(
+        sender, instance, CARD_USER_FIELDS, **kwargs)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    """Новому пользователю заводится строка счётчиков.
+    Смена имени обновляет карточки ленты и сбрасывает кэш лент
+    и карточек постов автора."""
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+        return
+    previous = getattr(instance, '_previous_names', None)
+    current = tuple(getattr(instance, field) for field in CARD_USER_FIELDS)
+    if previous is None or previous == current:
+        return
+    now = timezone.now()
+    posts = Post.objects.filter(author=instance)
+    posts.update(updated=now)
+    FeedCard.objects.filter(author=instance).update(
+        author_username=instance.username,
+        author_name=instance.get_full_name(),
+        updated=now,
+    )
+    bump_feed_versions_on_commit(author_scope(previous[0]),
+                                 author_scope(instance.username),
+                                 *posts_scopes(posts))
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, **kwargs):
+    """Запомнить прежние название и slug группы."""
+    instance._previous_names = previous_values(
+        sender, instance, CARD_GROUP_FIELDS, **kwargs)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    """Изменение названия или slug группы обновляет карточки ленты
+    и сбрасывает кэш лент и карточек её постов."""
+    previous = getattr(instance, '_previous_names', None)
+    current = tuple(getattr(instance, field) for field in CARD_GROUP_FIELDS)
+    if created or previous is None or previous == current:
+        return
+    now = timezone.now()
+    posts = Post.objects.filter(group=instance)
+    posts.update(updated=now)
+    FeedCard.objects.filter(group=instance).update(
+        group_title=instance.title,
+        group_slug=instance.slug,
+        updated=now,
+    )
+    bump_feed_versions_on_commit(group_scope(previous[1]),
+                                 group_scope(instance.slug),
+                                 *posts_scopes(posts))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    """Запомнить посты удаляемой группы: после удаления их group_id
+    уже обнулён массовым UPDATE."""
+    instance._post_ids = list(Post.objects.filter(
+        group=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    """Удаление группы убирает её из карточек бывших постов
+    и сбрасывает кэш лент. group_id карточек уже обнулён SET_NULL."""
+    post_ids = getattr(instance, '_post_ids', ())
+    if post_ids:
+        now = timezone.now()
+        Post.objects.filter(pk__in=post_ids).update(updated=now)
+        FeedCard.objects.filter(pk__in=post_ids).update(
+            group_title='', group_slug='', updated=now)
+    bump_feed_versions_on_commit(SITE_SCOPE, group_scope(instance.slug))
+
+
+def thumbnails_ready(post):
+    """Миниатюры созданы: сбросить кэш карточек и лент поста,
+    в которых могла остаться исходная картинка."""
+    now = timezone.now()
+    Post.objects.filter(pk=post.pk).update(updated=now)
+    FeedCard.objects.filter(pk=post.pk).update(updated=now)
+    invalidate_post_feeds(post)
+
+
+def schedule_post_thumbnails(post):
+    """Создать миниатюры новой картинки после фиксации транзакции."""
+    transaction.on_commit(lambda: schedule_thumbnails(
+        post.image.name, lambda: thumbnails_ready(post)))
+
+
+def release_image(name):
+    """Убрать ссылку на прежнюю картинку после фиксации транзакции.
+    Файл удаляется хранилищем, когда ссылок не остаётся."""
+    transaction.on_commit(lambda: Post.image.field.storage.delete(name))
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    """Запомнить прежние группу и картинку редактируемого поста."""
+    if not instance._state.adding:
+        previous = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'group__slug', 'image').first()
+        if previous is not None:
+            instance._previous_group = previous[:2]
+            instance._previous_image = previous[2]
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    """Новый пост попадает в ленты подписчиков автора и в счётчики.
+    Карточка ленты пересобирается при любом сохранении."""
+    sync_card(instance)
+    previous_image = getattr(instance, '_previous_image', None)
+    if instance.image.name != previous_image:
+        if instance.image:
+            schedule_post_thumbnails(instance)
+        if previous_image:
+            release_image(previous_image)
+    if created:
+        shift_user_stats(instance.author_id, 'posts_count', 1)
+        shift_group_posts(instance.group_id, 1)
+        fan_out_post(instance)
+        invalidate_post_feeds(instance)
+        return
+    previous_group_id, previous_group_slug = getattr(
+        instance, '_previous_group', None) or (None, None)
+    scopes = ()
+    if previous_group_id != instance.group_id:
+        shift_group_posts(previous_group_id, -1)
+        shift_group_posts(instance.group_id, 1)
+        if previous_group_slug is not None:
+            scopes = (group_scope(previous_group_slug),)
+    invalidate_post_feeds(instance, *scopes)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Удалённый пост вычитается из счётчиков и из кэша лент
+    и освобождает свою картинку."""
+    shift_user_stats(instance.author_id, 'posts_count', -1)
+    shift_group_posts(instance.group_id, -1)
+    invalidate_post_feeds(instance)
+    if instance.image:
+        release_image(instance.image.name)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    """Новый комментарий увеличивает счётчик поста."""
+    if created:
+        shift_post_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Удалённый комментарий уменьшает счётчик поста."""
+    shift_post_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """При подписке лента дополняется постами автора."""
+    if created:
+        shift_user_stats(instance.author_id, 'followers_count', 1)
+        shift_user_stats(instance.user_id, 'following_count', 1)
+        backfill_inbox(instance.user_id, instance.author_id)
+        bump_feed_versions_on_commit(follow_scope(instance.user_id),
+                                     author_scope(instance.author.username))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """При отписке посты автора убираются из ленты."""
+    shift_user_stats(instance.author_id, 'followers_count', -1)
+    shift_user_stats(instance.user_id, 'following_count', -1)
+    trim_inbox(instance.user_id, instance.author_id)
+    bump_feed_versions_on_commit(follow_scope(instance.user_id),
+                                 author_scope(instance.author.username))
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK_SIZE = 64 * 1024  # Размер куска при чтении для хеша, байт
+FILE_MODE = 0o644  # Права файла, если FILE_UPLOAD_PERMISSIONS не заданы
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+
+def content_hash(content):
+    """SHA-256 содержимого файла, читаемого кусками."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    """Имя по хешу в каталоге name с разбиением на подкаталоги:
+    posts/ab/cd/abcd....jpg."""
+    directory = os.path.dirname(name)
+    extension = os.path.splitext(name)[1].lower()
+    return os.path.join(directory, digest[:2], digest[2:4],
+                        digest + extension)
+
+
+def is_hashed(name):
+    """Имя уже дано хранилищем по содержимому."""
+    return bool(HASHED_NAME.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, где имя файла - хеш содержимого.
+    Одинаковые файлы хранятся один раз, число ссылок на файл
+    ведётся в модели StoredFile. delete уменьшает счётчик
+    и удаляет файл, когда ссылок не осталось.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        name = hashed_name(name, content_hash(content))
+        # Наличие файла проверяется после счётчика: удаление файла
+        # с последней ссылкой к этому моменту уже зафиксировано
+        self.acquire(name)
+        if not self.exists(name):
+            self._write(name, content)
+        return name
+
+    def _write(self, name, content):
+        """Записать файл через переименование: одновременная запись
+        того же содержимого другим процессом безопасна."""
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), path,
+                           allow_overwrite=True)
+        else:
+            with tempfile.NamedTemporaryFile(dir=directory,
+                                             delete=False) as file:
+                for chunk in content.chunks(HASH_CHUNK_SIZE):
+                    file.write(chunk)
+            os.replace(file.name, path)
+        os.chmod(path, self.file_permissions_mode or FILE_MODE)
+
+    @staticmethod
+    def _counter():
+        return apps.get_model('posts', 'StoredFile').objects
+
+    def acquire(self, name, count=1):
+        """Добавить ссылки на файл."""
+        counter = self._counter()
+        if counter.filter(name=name).update(refs=F('refs') + count):
+            return
+        try:
+            with transaction.atomic():
+                counter.create(name=name, refs=count)
+        except IntegrityError:
+            counter.filter(name=name).update(refs=F('refs') + count)
+
+    def delete(self, name):
+        """Убрать ссылку на файл. Файлы без счётчика ссылок, загруженные
+        до этого хранилища, не удаляются.
+        Файл удаляется в транзакции, удалившей счётчик: acquire того же
+        имени ждёт её фиксации и в _save уже не найдёт файла на диске.
+        """
+        counter = self._counter()
+        with transaction.atomic():
+            if not counter.filter(name=name, refs__gt=0).update(
+                    refs=F('refs') - 1):
+                return
+            if counter.filter(name=name, refs=0).delete()[0]:
+                super().delete(name)
+
+
+post_image_storage = ContentAddressedStorage()
@@ -0,0 +1,44 @@
+from django import template
+
+from posts.thumbnails import ready_thumbnail as lookup
+from posts.variants import get_manifest, picture
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(post, size):
+    """Готовая миниатюра картинки поста или None. Миниатюры создаются
+    пулом после загрузки, шаблон их только ищет. Для постов ленты
+    берутся данные preload_thumbnails."""
+    preloaded = getattr(post, 'preloaded_thumbnails', None)
+    if preloaded is not None:
+        return preloaded.get(size)
+    return lookup(post.image, size)
+
+
+def placeholder_style(post):
+    """Стиль картинки: место по её размерам и заглушка фоном,
+    пока картинка не загрузилась."""
+    style = 'height: auto;'
+    if post.image_placeholder:
+        style += (f' background: url({post.image_placeholder})'
+                  ' center / cover no-repeat;')
+    return style
+
+
+@register.inclusion_tag('includes/post_picture.html')
+def post_picture(post):
+    """Картинка поста с srcset по готовым вариантам.
+    Пока вариантов нет, выводится миниатюра или исходная картинка.
+    Заглушка и размеры берутся из полей поста."""
+    if hasattr(post, 'preloaded_variants'):
+        manifest = post.preloaded_variants
+    else:
+        manifest = get_manifest(post.image)
+    return {
+        'post': post,
+        'picture': picture(manifest) if manifest else None,
+        'thumbnail': None if manifest else ready_thumbnail(post, 'card'),
+        'style': placeholder_style(post),
+    }
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..cards import render_cards
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    """Класс для тестирования кэша карточек постов."""
+
+    def setUp(self):
+        """Создаём автора, группу и два поста."""
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        for i in range(2):
+            Post.objects.create(author=self.author, text=f'Пост {i}',
+                                group=self.group)
+
+    def cards(self):
+        return render_cards(Post.objects.select_related('author', 'group'),
+                            GROUP_LINK_DISPLAY=True)
+
+    def test_cards_fetched_with_one_get_many(self):
+        """Карточки читаются из кэша одним get_many без рендеринга."""
+        first = self.cards()
+        with mock.patch.object(cache, 'get_many',
+                               wraps=cache.get_many) as get_many, \
+                mock.patch('posts.cards.get_template') as get_template:
+            second = self.cards()
+        self.assertEqual(first, second)
+        get_many.assert_called_once()
+        get_template.assert_not_called()
+
+    def test_group_rename_invalidates_cards(self):
+        """Переименование группы обновляет карточки её постов."""
+        self.cards()
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertIn('Новое название', self.cards()[0])
+
+    def test_author_rename_invalidates_cards(self):
+        """Смена имени автора обновляет карточки его постов."""
+        self.cards()
+        self.author.first_name = 'Лев'
+        self.author.last_name = 'Толстой'
+        self.author.save()
+        self.assertIn('Лев Толстой', self.cards()[0])
+
+    def test_group_delete_invalidates_cards(self):
+        """Удаление группы убирает её ссылку из карточек постов."""
+        self.cards()
+        self.group.delete()
+        self.assertNotIn('/group/group/', self.cards()[0])
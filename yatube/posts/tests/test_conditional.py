@@ -0,0 +1,96 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    """Класс для тестирования ETag и Last-Modified."""
+
+    def setUp(self):
+        """Создаём автора, пост и гостя."""
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.detail_url = reverse('posts:post_detail',
+                                  kwargs={'post_id': self.post.pk})
+
+    def revalidate(self, url, response, client=None):
+        return (client or self.guest_client).get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+    def test_feeds_return_not_modified(self):
+        """Ленты отвечают 304 на совпавший ETag без рендеринга."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+                again = self.revalidate(url, response)
+                self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertIsNone(again.context)
+                again = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_feed_validator_changes(self):
+        """Новый пост и другая страница меняют ETag ленты."""
+        url = reverse('posts:index')
+        response = self.guest_client.get(url)
+        self.assertNotEqual(
+            self.guest_client.get(url, {'page': 2})['ETag'],
+            response['ETag']
+        )
+        with run_on_commit():
+            Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.revalidate(url, response).status_code,
+                         HTTPStatus.OK)
+
+    def test_post_detail_changes_on_comment_and_edit(self):
+        """ETag поста меняется после комментария и правки."""
+        response = self.guest_client.get(self.detail_url)
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Комментарий')
+        commented = self.revalidate(self.detail_url, response)
+        self.assertEqual(commented.status_code, HTTPStatus.OK)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        edited = self.revalidate(self.detail_url, commented)
+        self.assertEqual(edited.status_code, HTTPStatus.OK)
+        self.assertContains(edited, 'Исправленный пост')
+
+    def test_validators_differ_between_users(self):
+        """Гость и автор не получают чужую страницу по ETag."""
+        response = self.guest_client.get(self.detail_url)
+        again = self.revalidate(self.detail_url, response,
+                                self.author_client)
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+
+    def test_validators_change_with_csrf_token(self):
+        """Смена токена CSRF меняет ETag страницы с формой."""
+        response = self.author_client.get(self.detail_url)
+        again = self.revalidate(self.detail_url, response,
+                                self.author_client)
+        self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+        del self.author_client.cookies[settings.CSRF_COOKIE_NAME]
+        again = self.revalidate(self.detail_url, response,
+                                self.author_client)
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+        self.assertContains(again, 'csrfmiddlewaretoken')
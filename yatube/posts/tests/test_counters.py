@@ -0,0 +1,139 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    """Класс для тестирования денормализованных счётчиков."""
+
+    def setUp(self):
+        """Создаём автора, читателя и две группы."""
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group1 = Group.objects.create(title='Группа 1', slug='group1')
+        self.group2 = Group.objects.create(title='Группа 2', slug='group2')
+
+    def assertCounters(self, user, **expected):
+        stats = UserStats.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def test_posts_counters(self):
+        """Создание, перенос и удаление поста меняют счётчики."""
+        post = Post.objects.create(author=self.author, text='Пост',
+                                   group=self.group1)
+        self.assertCounters(self.author, posts_count=1)
+        self.group1.refresh_from_db()
+        self.assertEqual(self.group1.posts_count, 1)
+        post.group = self.group2
+        post.save()
+        self.group1.refresh_from_db()
+        self.group2.refresh_from_db()
+        self.assertEqual(self.group1.posts_count, 0)
+        self.assertEqual(self.group2.posts_count, 1)
+        post.delete()
+        self.assertCounters(self.author, posts_count=0)
+        self.group2.refresh_from_db()
+        self.assertEqual(self.group2.posts_count, 0)
+
+    def test_drifted_counters_stay_non_negative(self):
+        """Удаление при разошедшемся нулевом счётчике не падает."""
+        post = Post.objects.create(author=self.author, text='Пост',
+                                   group=self.group1)
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        UserStats.objects.filter(user=self.author).update(posts_count=0)
+        Group.objects.filter(pk=self.group1.pk).update(posts_count=0)
+        Post.objects.filter(pk=post.pk).update(comments_count=0)
+        post.delete()
+        self.assertCounters(self.author, posts_count=0)
+        self.group1.refresh_from_db()
+        self.assertEqual(self.group1.posts_count, 0)
+
+    def test_comments_and_follow_counters(self):
+        """Комментарии и подписки меняют счётчики."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(post=post, author=self.reader,
+                                         text='Комментарий')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertCounters(self.author, followers_count=1)
+        self.assertCounters(self.reader, following_count=1)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertCounters(self.author, followers_count=0)
+        self.assertCounters(self.reader, following_count=0)
+
+    def test_recount_command(self):
+        """Команда восстанавливает рассинхронизированные счётчики."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}', group=self.group1)
+            for i in range(3)
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.update(posts_count=0, followers_count=5)
+        UserStats.objects.filter(user=self.reader).delete()
+        Group.objects.update(posts_count=0)
+        call_command('recount_counters', stdout=StringIO())
+        self.assertCounters(self.author, posts_count=3, followers_count=1)
+        self.assertCounters(self.reader, following_count=1)
+        self.group1.refresh_from_db()
+        self.assertEqual(self.group1.posts_count, 3)
+
+    def test_profile_reads_counter(self):
+        """Профиль не считает посты автора запросом COUNT."""
+        Post.objects.create(author=self.author, text='Пост')
+        url = reverse('posts:profile',
+                      kwargs={'username': self.author.username})
+        with override_settings(PAGE_CACHE_ENABLED=False), \
+                CaptureQueriesContext(connection) as queries:
+            response = Client().get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assertFalse(any(
+            'COUNT(' in query['sql'].upper() for query in queries
+        ))
+
+    def test_drifted_counter_falls_back_to_count(self):
+        """Пустой или завышенный счётчик не ломает пагинацию."""
+        Post.objects.create(author=self.author, text='Пост')
+        url = reverse('posts:profile',
+                      kwargs={'username': self.author.username})
+        for value in (0, 7):
+            with self.subTest(posts_count=value):
+                UserStats.objects.filter(user=self.author).update(
+                    posts_count=value)
+                with override_settings(PAGE_CACHE_ENABLED=False):
+                    response = Client().get(url)
+                page_obj = response.context['page_obj']
+                self.assertEqual(page_obj.paginator.count, 1)
+                self.assertEqual(len(page_obj), 1)
+
+    def test_full_save_keeps_counters(self):
+        """Полное сохранение устаревшего объекта не затирает счётчики."""
+        post = Post.objects.create(author=self.author, text='Пост',
+                                   group=self.group1)
+        group = Group.objects.get(pk=self.group1.pk)
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        Post.objects.create(author=self.author, text='Пост',
+                            group=self.group1)
+        post.text = 'Новый текст'
+        post.save()
+        group.description = 'Описание'
+        group.save()
+        post.refresh_from_db()
+        group.refresh_from_db()
+        self.assertEqual(post.text, 'Новый текст')
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(group.posts_count, 2)
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+HEAVY_COLUMNS = ('"password"', '"email"', '"description"')
+
+
+class FeedQueriesTest(TestCase):
+    """Класс для тестирования запросов лент."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём группу, двух авторов и подписчика."""
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Длинное описание')
+        cls.authors = [User.objects.create_user(username=f'author{i}')
+                       for i in range(2)]
+        cls.reader = User.objects.create_user(username='reader')
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def add_posts(self, number):
+        for i in range(number):
+            Post.objects.create(author=self.authors[i % 2], group=self.group,
+                                text=f'Пост {i}')
+
+    def feed_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return [query['sql'] for query in queries]
+
+    def test_feed_queries(self):
+        """Число запросов не зависит от числа постов, посты читаются из
+        карточек ленты без JOIN с авторами и группами."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.authors[0].username}),
+            reverse('posts:follow_index'),
+        )
+        self.add_posts(2)
+        few = {url: len(self.feed_queries(url)) for url in urls}
+        self.add_posts(10)
+        for url in urls:
+            with self.subTest(url=url):
+                queries = self.feed_queries(url)
+                self.assertEqual(len(queries), few[url])
+                feed = [sql for sql in queries
+                        if sql.startswith('SELECT "posts_feedcard"')
+                        and 'LIMIT' in sql]
+                self.assertEqual(len(feed), 1)
+                self.assertNotIn('"auth_user"', feed[0])
+                self.assertNotIn('"posts_group"', feed[0])
+                for column in HEAVY_COLUMNS:
+                    self.assertNotIn(column, feed[0])
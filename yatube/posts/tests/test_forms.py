@@ -136,7 +136,7 @@ class PostCreateFormTests(TestCase):
             'text': 'Пост с картинкой',
             'author': self.user.id,
             'group': None,
-            'image': f'posts/{form_data["image"].name}'
+            'image__regex': r'^posts/\w{2}/\w{2}/[0-9a-f]{64}\.gif$'
         }
         count_posts = Post.objects.count()
         response = self.authorized_client.post(
@@ -0,0 +1,153 @@
+import base64
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..ingest import MAX_STORED_SIDE, check_header
+from ..models import FeedCard, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112  # Тег EXIF с ориентацией снимка
+
+
+def png_header(width, height):
+    """Заголовок PNG без пикселей с заявленными размерами."""
+    data = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    chunks = b''
+    for chunk in (b'IHDR' + data, b'IDAT'):
+        chunks += (struct.pack('>I', len(chunk) - 4) + chunk
+                   + struct.pack('>I', zlib.crc32(chunk)))
+    return b'\x89PNG\r\n\x1a\n' + chunks
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class IngestTest(TestCase):
+    """Класс для тестирования приёма картинок постов"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(User.objects.create_user(username='author'))
+
+    def test_header_limits(self):
+        """Огромные размеры отклоняются по одному заголовку"""
+        for width, height in ((20000, 10), (6000, 6000), (100000, 100000)):
+            with self.subTest(size=(width, height)):
+                upload = SimpleUploadedFile('bomb.png',
+                                            png_header(width, height))
+                with self.assertRaises(ValidationError) as error:
+                    check_header(upload)
+                self.assertEqual(error.exception.code, 'too_large')
+        self.assertEqual(check_header(SimpleUploadedFile(
+            'ok.png', png_header(800, 600))), ('PNG', 800, 600))
+
+    def test_original_normalized(self):
+        """Оригинал повёрнут по EXIF, уменьшен и сохранён без EXIF"""
+        image = Image.new('RGB', (3200, 1600), (10, 200, 10))
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=exif.tobytes())
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Большое фото',
+            'image': SimpleUploadedFile('photo.jpeg', buffer.getvalue(),
+                                        'image/jpeg'),
+        })
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get(text='Большое фото')
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size,
+                             (MAX_STORED_SIDE // 2, MAX_STORED_SIDE))
+            self.assertNotIn('exif', stored.info)
+
+    def test_too_large_rejected_by_form(self):
+        """Форма не принимает картинку больше допустимой"""
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Бомба',
+            'image': SimpleUploadedFile('bomb.png', png_header(20000, 20000),
+                                        'image/png'),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.filter(text='Бомба').exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PlaceholderTest(TestCase):
+    """Класс для тестирования заглушек и размеров картинок"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+
+    @staticmethod
+    def png(size):
+        buffer = BytesIO()
+        Image.new('RGB', size, (200, 100, 0)).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def test_placeholder_stored_on_upload(self):
+        """Размеры и заглушка считаются при загрузке и выводятся в ленте"""
+        post = Post.objects.create(
+            author=self.author, text='Пост',
+            image=SimpleUploadedFile('wide.png', self.png((640, 320))))
+        self.assertEqual((post.image_width, post.image_height), (640, 320))
+        prefix = 'data:image/png;base64,'
+        self.assertTrue(post.image_placeholder.startswith(prefix))
+        data = base64.b64decode(post.image_placeholder[len(prefix):])
+        with Image.open(BytesIO(data)) as placeholder:
+            self.assertEqual(placeholder.size, (16, 8))
+        card = FeedCard.objects.get(pk=post.pk)
+        self.assertEqual(card.image_placeholder, post.image_placeholder)
+        content = Client().get(reverse('posts:index')).content.decode()
+        self.assertIn('width="640" height="320"', content)
+        self.assertIn(f'background: url({post.image_placeholder})', content)
+
+    def test_cleared_image(self):
+        """Без картинки размеры и заглушка сбрасываются"""
+        post = Post.objects.create(
+            author=self.author, text='Пост',
+            image=SimpleUploadedFile('wide.png', self.png((64, 32))))
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_placeholder),
+                         (None, ''))
+
+    def test_backfill_command(self):
+        """Команда заполняет размеры картинок, загруженных раньше"""
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'old.png'),
+                  'wb') as file:
+            file.write(self.png((30, 60)))
+        post = Post.objects.create(author=self.author, text='Старый',
+                                   image='posts/old.png')
+        self.assertIsNone(post.image_width)
+        out = StringIO()
+        call_command('describe_post_images', stdout=out)
+        self.assertIn('Обработано картинок: 1', out.getvalue())
+        card = FeedCard.objects.get(pk=post.pk)
+        self.assertEqual((card.image_width, card.image_height), (30, 60))
+        self.assertTrue(card.image_placeholder)
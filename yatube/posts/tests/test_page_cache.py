@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    """Класс для тестирования кэша страниц с дырками."""
+
+    def setUp(self):
+        """Создаём автора, читателя и пост."""
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.profile_url = reverse('posts:profile',
+                                   kwargs={'username': 'author'})
+
+    def test_anonymous_page_served_without_view(self):
+        """Повторная анонимная страница отдаётся без запросов к БД."""
+        first = self.guest_client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(first.content, second.content)
+        self.assertIsNone(second.context)
+
+    def test_authenticated_user_gets_own_holes(self):
+        """Авторизованный пользователь получает общий каркас со своими
+        фрагментами."""
+        self.guest_client.get(self.profile_url)
+        response = self.reader_client.get(self.profile_url)
+        self.assertNotIn('page_obj', response.context)
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(response, 'Войти')
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(self.profile_url)
+        self.assertContains(response, 'Отписаться')
+        guest = self.guest_client.get(self.profile_url)
+        self.assertContains(guest, 'Войти')
+        self.assertNotContains(guest, 'Подписаться')
+
+    def test_page_invalidated_by_new_post(self):
+        """Новый пост сбрасывает кэш страницы."""
+        self.guest_client.get(reverse('posts:index'))
+        with run_on_commit():
+            Post.objects.create(author=self.author, text='Свежий пост')
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+
+    def test_cached_page_keeps_headers(self):
+        """Страница из кэша отдаётся с заголовками первого ответа."""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        for header in ('X-Frame-Options', 'ETag', 'Last-Modified', 'Vary'):
+            with self.subTest(header=header):
+                self.assertIn(header, first)
+                self.assertEqual(second[header], first[header])
+        self.reader_client.get(self.profile_url)
+        response = self.reader_client.get(self.profile_url)
+        self.assertIn('Cookie', response['Vary'])
+        self.assertEqual(response['X-Frame-Options'], 'SAMEORIGIN')
+
+    def test_cached_page_revalidated(self):
+        """Страница из кэша отвечает 304 на совпавший ETag."""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            again = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
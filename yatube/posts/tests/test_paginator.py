@@ -0,0 +1,161 @@
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..paginator.paginator import (CURSOR_FORWARD, CURSOR_PARAM, ELLIPSIS,
+                                   CursorPage, CursorPaginator,
+                                   decode_cursor, encode_cursor,
+                                   page_window)
+
+User = get_user_model()
+PER_PAGE = 10  # Кол-во постов на странице
+NUMBER_OF_POSTS = 23  # Всего постов
+
+
+class CursorPaginatorTest(TestCase):
+    """Класс для тестирования курсорного пагинатора."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        """Создаём автора и посты."""
+        cls.author = User.objects.create_user(username='test_name')
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {i}', author=cls.author)
+            for i in range(NUMBER_OF_POSTS)
+        )
+        cls.expected = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+
+    def test_pages_follow_each_other(self):
+        """Курсоры вперёд и назад обходят ленту без пропусков."""
+        first = self.paginator.page(None)
+        second = self.paginator.page(first.next_cursor)
+        third = self.paginator.page(second.next_cursor)
+        self.assertIsInstance(first, CursorPage)
+        self.assertEqual(
+            list(first) + list(second) + list(third),
+            CursorPaginatorTest.expected
+        )
+        self.assertFalse(first.has_previous())
+        self.assertTrue(second.has_next())
+        self.assertFalse(third.has_next())
+        back = self.paginator.page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        back = self.paginator.page(back.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_no_count_and_no_offset(self):
+        """Страница выбирается одним запросом без COUNT и OFFSET."""
+        cursor = self.paginator.page(None).next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            page = self.paginator.page(cursor)
+            page.has_other_pages()
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+        self.assertIn(f'LIMIT {PER_PAGE + 1}', sql)
+
+    def test_broken_cursor_gives_first_page(self):
+        """Битый курсор не ломает страницу."""
+        self.assertIsNone(decode_cursor('не-курсор'))
+        page = self.paginator.page('bm90LWEtY3Vyc29y')
+        self.assertEqual(list(page), CursorPaginatorTest.expected[:PER_PAGE])
+
+    def test_page_api(self):
+        """Методы Page не падают и опираются на курсоры."""
+        first = self.paginator.page(None)
+        self.assertEqual(first.next_page_number(), first.next_cursor)
+        self.assertIsNone(first.previous_page_number())
+        self.assertEqual((first.start_index(), first.end_index()),
+                         (1, PER_PAGE))
+        second = self.paginator.page(first.next_cursor)
+        self.assertEqual(second.previous_page_number(),
+                         second.previous_cursor)
+        self.assertEqual(second.start_index(), PER_PAGE + 1)
+        unknown = self.paginator.page(
+            encode_cursor(CURSOR_FORWARD, first[-1]))
+        self.assertIsNone(unknown.start_index())
+        self.assertIsNone(unknown.end_index())
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True,
+                       PAGE_CACHE_ENABLED=False)
+    def test_index_in_cursor_mode(self):
+        """Главная страница работает в курсорном режиме."""
+        client = Client()
+        response = client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), PER_PAGE)
+        self.assertContains(
+            response, f'?{CURSOR_PARAM}={page_obj.next_cursor}'
+        )
+        response = client.get(
+            reverse('posts:index'), {CURSOR_PARAM: page_obj.next_cursor}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            CursorPaginatorTest.expected[PER_PAGE:PER_PAGE * 2]
+        )
+
+
+class PageWindowTest(TestCase):
+    """Класс для тестирования окна страниц."""
+
+    @staticmethod
+    def numbers(window):
+        return [number for number, _ in window]
+
+    def test_numbered_window(self):
+        """Окно содержит края и соседей текущей страницы с пропусками."""
+        paginator = Paginator(range(1000), PER_PAGE)
+        window = page_window(paginator.page(50))
+        self.assertEqual(self.numbers(window),
+                         [1, None, 48, 49, 50, 51, 52, None, 100])
+        self.assertIn(ELLIPSIS, window)
+        self.assertEqual(window[0], (1, '?page=1'))
+        self.assertEqual(self.numbers(page_window(paginator.page(1))),
+                         [1, 2, 3, None, 100])
+        paginator = Paginator(range(100), PER_PAGE)
+        self.assertEqual(self.numbers(page_window(paginator.page(5))),
+                         [1, 2, 3, 4, 5, 6, 7, None, 10])
+
+    def test_cursor_window(self):
+        """В курсорном режиме номер страницы переносится в курсоре."""
+        author = User.objects.create_user(username='window')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=author)
+            for i in range(NUMBER_OF_POSTS)
+        )
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        first = paginator.page(None)
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+        self.assertEqual((first.number, second.number, third.number),
+                         (1, 2, 3))
+        self.assertEqual(self.numbers(page_window(second)), [1, 2, 3, None])
+        window = page_window(third)
+        self.assertEqual(self.numbers(window), [1, 2, 3])
+        self.assertEqual(window[1][1],
+                         f'?{CURSOR_PARAM}={third.previous_cursor}')
+        self.assertEqual(paginator.page(third.previous_cursor).number, 2)
+
+    def test_feed_renders_window(self):
+        """Лента выводит окно, а не все страницы."""
+        author = User.objects.create_user(username='many')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=author) for i in range(200)
+        )
+        response = Client().get(reverse('posts:index'), {'page': 10})
+        content = response.content.decode()
+        self.assertIn('href="?page=9"', content)
+        self.assertIn('href="?page=20"', content)
+        self.assertNotIn('href="?page=5"', content)
+        self.assertIn('&hellip;', content)
@@ -0,0 +1,61 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from ..models import FeedCard, Follow, Group, Post
+from ..timeline import timeline_cards
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class FeedQueryPlanTests(TestCase):
+    """Класс для проверки, что ленты читаются по индексам без сортировки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём автора, группу и пост."""
+        cls.author = User.objects.create_user(username='test_name')
+        cls.group = Group.objects.create(title='Группа', slug='test_slug')
+        cls.post = Post.objects.create(author=cls.author, text='Пост',
+                                       group=cls.group)
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return ' '.join(str(row[-1]) for row in cursor.fetchall())
+
+    def test_feeds_use_indexes(self):
+        """Ленты используют составные индексы и не сортируют во временном
+        B-дереве."""
+        author = FeedQueryPlanTests.author
+        feeds = {
+            'post_pub_date_idx': Post.objects.all()[:10],
+            'post_author_pub_date_idx': author.posts.all()[:10],
+            'post_group_pub_date_idx':
+                FeedQueryPlanTests.group.posts.all()[:10],
+            'comment_post_pub_date_idx':
+                FeedQueryPlanTests.post.comments.all(),
+            'follow_author_user_idx': Follow.objects.filter(
+                author=author).values('user'),
+            'timeline_user_pub_date_idx': timeline_cards(author)[:10],
+            'card_pub_date_idx': FeedCard.objects.all()[:10],
+            'card_author_pub_date_idx':
+                FeedCard.objects.filter(author=author)[:10],
+            'card_group_pub_date_idx': FeedCard.objects.filter(
+                group=FeedQueryPlanTests.group)[:10],
+        }
+        for index, queryset in feeds.items():
+            with self.subTest(index=index):
+                plan = self.query_plan(queryset)
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_timeline_skips_posts_table(self):
+        """Лента подписок соединяет записи с карточками напрямую."""
+        sql = str(timeline_cards(FeedQueryPlanTests.author).query)
+        self.assertIn('posts_timelineentry', sql)
+        self.assertNotIn('posts_post', sql)
@@ -0,0 +1,135 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..feed_cache import (INDEX_SCOPE, SITE_SCOPE, author_scope,
+                          follow_scope, group_scope)
+from ..models import Comment, FeedCard, Follow, Group, Post
+from ..read_model import check_cards
+
+User = get_user_model()
+
+
+class FeedCardTests(TestCase):
+    """Класс для тестирования карточек ленты."""
+
+    def setUp(self):
+        """Создаём автора, группу и пост."""
+        self.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(author=self.author, text='Пост',
+                                        group=self.group)
+
+    def card(self):
+        return FeedCard.objects.get(pk=self.post.pk)
+
+    def test_card_created_with_post(self):
+        """Карточка создаётся вместе с постом и повторяет его поля."""
+        card = self.card()
+        self.assertEqual(
+            (card.author_username, card.author_name, card.group_slug,
+             card.group_title, card.text, card.pub_date),
+            ('author', 'Лев Толстой', 'group', 'Группа', 'Пост',
+             self.post.pub_date)
+        )
+        self.assertEqual(check_cards(), [])
+
+    def test_card_follows_writes(self):
+        """Карточка обновляется при правке поста, автора, группы
+        и комментариев."""
+        self.post.text = 'Новый текст'
+        self.post.group = None
+        self.post.save()
+        self.author.first_name = 'Алексей'
+        self.author.save()
+        group = Group.objects.create(title='Вторая', slug='second')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        Post.objects.get(pk=self.post.pk).save()
+        group.title = 'Переименована'
+        group.save()
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Комментарий')
+        card = self.card()
+        self.assertEqual(
+            (card.text, card.author_name, card.group_title,
+             card.comments_count),
+            ('Новый текст', 'Алексей Толстой', 'Переименована', 1)
+        )
+        self.assertEqual(check_cards(), [])
+        self.post.delete()
+        self.assertFalse(FeedCard.objects.exists())
+
+    def test_card_follows_group_delete(self):
+        """Удаление группы убирает её из карточек без расхождений."""
+        self.group.delete()
+        card = self.card()
+        self.assertEqual((card.group_id, card.group_title, card.group_slug),
+                         (None, '', ''))
+        self.assertEqual(check_cards(), [])
+
+    def test_unrelated_saves_keep_cards(self):
+        """Сохранение без смены имён не трогает карточки и кэш лент."""
+        updated = self.card().updated
+        with mock.patch('posts.signals.bump_feed_versions_on_commit') as bump:
+            self.author.email = 'author@example.com'
+            self.author.save()
+            self.group.description = 'Описание'
+            self.group.save()
+        bump.assert_not_called()
+        self.assertEqual(self.card().updated, updated)
+
+    def test_rename_bumps_affected_scopes(self):
+        """Переименование сбрасывает только затронутые области лент."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        expected = {INDEX_SCOPE, author_scope('author'),
+                    group_scope('group'), follow_scope(reader.pk)}
+        with mock.patch('posts.signals.bump_feed_versions_on_commit') as bump:
+            self.author.username = 'writer'
+            self.author.save()
+        scopes = set(bump.call_args[0])
+        self.assertEqual(scopes, expected | {author_scope('writer')})
+        with mock.patch('posts.signals.bump_feed_versions_on_commit') as bump:
+            self.group.slug = 'renamed'
+            self.group.save()
+        scopes = set(bump.call_args[0])
+        self.assertEqual(
+            scopes,
+            expected - {author_scope('author')} | {
+                author_scope('writer'), group_scope('renamed')}
+        )
+        self.assertNotIn(SITE_SCOPE, scopes)
+
+    def test_card_as_post(self):
+        """Карточка отдаётся как пост без запросов к автору и группе."""
+        with self.assertNumQueries(1):
+            post = FeedCard.objects.as_posts().get()
+            self.assertEqual(post, self.post)
+            self.assertEqual(post.author, self.author)
+            self.assertEqual(post.author.get_full_name(), 'Лев Толстой')
+            self.assertEqual(post.group, self.group)
+
+    def test_bulk_created_posts_get_cards(self):
+        """Посты из bulk_create получают карточки."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}') for i in range(3))
+        self.assertEqual(FeedCard.objects.count(), 4)
+
+    def test_check_and_rebuild_commands(self):
+        """Сверка находит расхождения, пересборка их устраняет."""
+        FeedCard.objects.filter(pk=self.post.pk).update(text='Устарело')
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('check_feed_cards', stdout=out)
+        self.assertIn(f'Пост {self.post.pk}: text', out.getvalue())
+        call_command('check_feed_cards', '--fix', stdout=StringIO())
+        self.assertEqual(self.card().text, 'Пост')
+        FeedCard.objects.all().delete()
+        self.assertEqual(check_cards(), [(self.post.pk, 'missing')])
+        call_command('rebuild_feed_cards', stdout=StringIO())
+        self.assertEqual(check_cards(), [])
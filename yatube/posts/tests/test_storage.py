@@ -0,0 +1,205 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default
+
+from ..models import FeedCard, Post, StoredFile
+from ..storage import is_hashed
+from ..thumbnails import ready_thumbnail, thumbnail_file
+from ..variants import VARIANT_IDENTITY, get_manifest, source_file
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    """Класс для тестирования хранилища картинок по хешу"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.storage = Post.image.field.storage
+
+    def create(self, text, name):
+        post = Post(author=self.author, text=text)
+        post.image.save(name, ContentFile(SMALL_GIF), save=False)
+        post.save()
+        return post
+
+    def test_same_content_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом со счётчиком"""
+        first = self.create('Первый', 'cat.gif')
+        second = self.create('Второй', 'other-name.GIF')
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertTrue(is_hashed(name))
+        self.assertRegex(name, r'^posts/(\w\w)/(\w\w)/\1\2\w{60}\.gif$')
+        self.assertEqual(StoredFile.objects.get(name=name).refs, 2)
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_legacy_file_not_deleted(self):
+        """Файлы без счётчика ссылок хранилище не удаляет"""
+        path = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'legacy.gif')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(SMALL_GIF)
+        self.storage.delete('posts/legacy.gif')
+        self.assertTrue(os.path.exists(path))
+
+    def test_migrate_legacy_files(self):
+        """Команда переносит старые картинки и переписывает пути"""
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for name in ('a.gif', 'b.gif'):
+            with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', name),
+                      'wb') as file:
+                file.write(SMALL_GIF)
+        for text, image in (('А', 'posts/a.gif'), ('А2', 'posts/a.gif'),
+                            ('Б', 'posts/b.gif'), ('Нет', 'posts/no.gif')):
+            Post.objects.create(author=self.author, text=text, image=image)
+        out = StringIO()
+        with mock.patch('posts.management.commands.generate_thumbnails.'
+                        'generate_thumbnails') as generate:
+            call_command('migrate_media_storage', batch_size=1, stdout=out,
+                         stderr=StringIO())
+        self.assertIn('перенесено 1, дубликатов 1, нет на диске 1, '
+                      'постов 3', out.getvalue())
+        names = set(Post.objects.exclude(text='Нет').values_list(
+            'image', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        generate.assert_any_call(name)
+        self.assertTrue(is_hashed(name))
+        self.assertTrue(self.storage.exists(name))
+        self.assertFalse(self.storage.exists('posts/a.gif'))
+        self.assertEqual(StoredFile.objects.get(name=name).refs, 3)
+        self.assertEqual(
+            FeedCard.objects.filter(image=name).count(), 3)
+        self.assertEqual(Post.objects.get(text='Нет').image.name,
+                         'posts/no.gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageTest(TestCase):
+    """Класс для тестирования сборки мусора в медиа"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def write(self, name):
+        path = os.path.join(TEMP_MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(SMALL_GIF)
+        return name
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.quarantine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.quarantine, True)
+        author = User.objects.create_user(username='author')
+        post = Post(author=author, text='Пост')
+        post.image.save('cat.gif', ContentFile(SMALL_GIF))
+        source = source_file(post.image.name)
+        default.kvstore.get_or_set(source)
+        thumbnail = thumbnail_file(post.image.name, 'card')
+        self.write(thumbnail.name)
+        thumbnail.set_size([960, 339])
+        default.kvstore.set(thumbnail, source)
+        self.live = [
+            post.image.name, thumbnail.name,
+            self.write(f'variants/ab/cd/{source.key}/320.webp'),
+        ]
+        self.orphans = [
+            self.write('posts/old.gif'),
+            self.write('cache/00/11/0011aa.jpg'),
+            self.write('variants/00/11/0011bb/320.webp'),
+        ]
+
+    def collect(self, *args):
+        out = StringIO()
+        call_command('collect_media_garbage', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run(self):
+        """Пробный запуск считает файлы без ссылок и ничего не трогает"""
+        output = self.collect('--dry-run', '--min-age=0')
+        self.assertIn('просмотрено 6, без ссылок 3', output)
+        self.assertTrue(all(map(self.exists, self.live + self.orphans)))
+
+    def test_recent_files_skipped(self):
+        """Только что записанные файлы не считаются мусором"""
+        output = self.collect()
+        self.assertIn('без ссылок 0', output)
+        self.assertIn('пропущено новых 3', output)
+
+    def test_quarantine(self):
+        """Файлы без ссылок переносятся в карантин, нужные остаются"""
+        self.collect('--min-age=0', '--batch-size=2',
+                     f'--quarantine={self.quarantine}')
+        self.assertTrue(all(map(self.exists, self.live)))
+        self.assertFalse(any(map(self.exists, self.orphans)))
+        for name in self.orphans:
+            self.assertTrue(
+                os.path.exists(os.path.join(self.quarantine, name)))
+
+    def test_upload_in_flight_kept(self):
+        """Файл со ссылкой в StoredFile без поста не удаляется"""
+        name = Post.image.field.storage.save('posts/new.gif',
+                                             ContentFile(SMALL_GIF + b'1'))
+        self.collect('--min-age=0')
+        self.assertTrue(self.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).refs, 1)
+
+    def test_kvstore_entries_removed(self):
+        """Вместе с картинкой из kvstore удаляются её записи"""
+        name = Post.image.field.storage.save('posts/gone.gif',
+                                             ContentFile(SMALL_GIF + b'2'))
+        StoredFile.objects.filter(name=name).update(refs=0)
+        source = source_file(name)
+        default.kvstore.get_or_set(source)
+        thumbnail = thumbnail_file(name, 'card')
+        self.write(thumbnail.name)
+        thumbnail.set_size([960, 339])
+        default.kvstore.set(thumbnail, source)
+        default.kvstore._set(source.key, {'widths': [320]},
+                             identity=VARIANT_IDENTITY)
+        self.collect('--min-age=0')
+        self.assertFalse(self.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+        self.assertIsNone(default.kvstore.get(source))
+        self.assertIsNone(ready_thumbnail(name, 'card'))
+        self.assertIsNone(get_manifest(name))
+        self.assertTrue(all(map(self.exists, self.live)))
@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import FeedCard, Post
+
+User = get_user_model()
+TEXT = 'Первая <b>строка</b>\nвторая строка'
+TEXT_HTML = 'Первая &lt;b&gt;строка&lt;/b&gt;<br>вторая строка'
+
+
+class TextHtmlTests(TestCase):
+    """Класс для тестирования HTML текста, вычисляемого при сохранении."""
+
+    def setUp(self):
+        """Создаём автора и пост."""
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text=TEXT)
+
+    def test_html_rendered_on_save(self):
+        """HTML экранирован, переносы заменены при сохранении поста."""
+        self.assertEqual(self.post.text_html, TEXT_HTML)
+        self.assertEqual(FeedCard.objects.get(pk=self.post.pk).text_html,
+                         TEXT_HTML)
+        self.post.text = 'Новый\nтекст'
+        self.post.save(update_fields=('text',))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, 'Новый<br>текст')
+
+    def test_html_rendered_on_bulk_create(self):
+        """bulk_create тоже заполняет HTML."""
+        post, = Post.objects.bulk_create([Post(author=self.author,
+                                               text=TEXT)])
+        self.assertEqual(post.text_html, TEXT_HTML)
+
+    def test_pages_use_stored_html(self):
+        """Страницы выводят сохранённый HTML как есть."""
+        Post.objects.filter(pk=self.post.pk).update(text_html='<i>Готово</i>')
+        FeedCard.objects.filter(pk=self.post.pk).update(
+            text_html='<i>Готово</i>')
+        for url in (reverse('posts:index'),
+                    reverse('posts:post_detail',
+                            kwargs={'post_id': self.post.pk})):
+            with self.subTest(url=url):
+                self.assertContains(Client().get(url), '<i>Готово</i>')
+
+    def test_missing_html_fallback_and_backfill(self):
+        """Без HTML текст выводится фильтром, команда заполняет HTML."""
+        Post.objects.filter(pk=self.post.pk).update(text_html='')
+        FeedCard.objects.filter(pk=self.post.pk).update(text_html='')
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertContains(Client().get(url), TEXT_HTML)
+        call_command('render_post_html', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, TEXT_HTML)
+        self.assertEqual(FeedCard.objects.get(pk=self.post.pk).text_html,
+                         TEXT_HTML)
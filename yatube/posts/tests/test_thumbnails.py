@@ -0,0 +1,223 @@
+import shutil
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+
+from .. import thumbnails
+from ..cards import render_cards
+from ..models import FeedCard, Post
+from ..variants import create_variants, get_manifest, source_file
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+# sorl-thumbnail 12.7 уменьшает через Image.ANTIALIAS, его нет в Pillow 10+
+SORL_CAN_RESIZE = hasattr(Image, 'ANTIALIAS')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
+class ThumbnailTest(TestCase):
+    """Класс для тестирования генерации миниатюр после загрузки"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(
+            author=self.author, text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        self.name = self.post.image.name
+
+    def test_template_only_looks_up(self):
+        """Шаблон не создаёт миниатюру, а показывает исходную картинку"""
+        response = Client().get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertContains(response, f'src="{self.post.image.url}"')
+        self.assertIsNone(thumbnails.ready_thumbnail(self.name, 'card'))
+
+    @skipUnless(SORL_CAN_RESIZE, 'Pillow несовместим с sorl')
+    def test_generated_thumbnail_served(self):
+        """После генерации шаблон выдаёт готовую миниатюру"""
+        self.assertTrue(thumbnails.schedule_thumbnails(self.name).result())
+        thumbnail = thumbnails.ready_thumbnail(self.name, 'card')
+        self.assertEqual(thumbnail.size, [960, 339])
+        self.assertEqual(
+            thumbnail.name,
+            default.backend.get_thumbnail(
+                source_file(self.name), '960x339', crop='center',
+                upscale=True).name
+        )
+        manifest = get_manifest(self.name)
+        self.assertEqual(manifest['widths'], [320])
+        response = Client().get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertContains(
+            response, f'/media/{manifest["directory"]}/320.gif 320w')
+
+    def test_single_flight(self):
+        """Картинка, которую уже обрабатывают, не генерируется повторно"""
+        cache.add(thumbnails._lock_key(self.name), True)
+        self.assertFalse(thumbnails.generate_thumbnails(self.name))
+        self.assertIsNone(thumbnails.ready_thumbnail(self.name, 'card'))
+
+    @override_settings(POSTS_THUMBNAIL_WORKERS=2)
+    def test_pool_shares_task(self):
+        """Повторная постановка той же картинки возвращает ту же задачу"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def generate(name, on_ready):
+            started.set()
+            release.wait(5)
+            return True
+
+        with mock.patch.object(thumbnails, '_run', generate):
+            first = thumbnails.schedule_thumbnails(self.name)
+            started.wait(5)
+            self.assertIs(thumbnails.schedule_thumbnails(self.name), first)
+            thumbnails._in_flight.pop(self.name)
+            release.set()
+        self.assertTrue(first.result(5))
+
+    @skipUnless(SORL_CAN_RESIZE, 'Pillow несовместим с sorl')
+    def test_backfill_command(self):
+        """Команда создаёт недостающие миниатюры"""
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('Картинок с новыми миниатюрами: 1', out.getvalue())
+        self.assertIsNotNone(thumbnails.ready_thumbnail(self.name, 'card'))
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('Картинок с новыми миниатюрами: 0', out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
+class PreloadThumbnailTest(TestCase):
+    """Класс для тестирования пакетного поиска миниатюр ленты"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        for i in range(3):
+            buffer = BytesIO()
+            Image.new('RGB', (2, 1), (i, i, i)).save(buffer, 'GIF')
+            Post.objects.create(
+                author=author, text=f'Пост {i}',
+                image=SimpleUploadedFile(f'{i}.gif', buffer.getvalue(),
+                                         'image/gif'))
+        Post.objects.create(author=author, text='Без картинки')
+        self.posts = list(FeedCard.objects.as_posts())
+        self.ready = self.posts[1]
+        thumbnail = thumbnails.thumbnail_file(self.ready.image, 'card')
+        thumbnail.set_size([960, 339])
+        default.kvstore.set(thumbnail)
+        cache.clear()
+
+    def kvstore_queries(self, queries):
+        return [query for query in queries
+                if 'thumbnail_kvstore' in query['sql']]
+
+    def test_preload_in_one_query(self):
+        """Миниатюры страницы ищутся одним запросом, повторно - из кэша"""
+        with CaptureQueriesContext(connection) as queries:
+            thumbnails.preload_thumbnails(self.posts)
+        self.assertEqual(len(self.kvstore_queries(queries)), 1)
+        found = {post.pk: post.preloaded_thumbnails['card']
+                 for post in self.posts}
+        self.assertEqual(found[self.ready.pk].size, [960, 339])
+        self.assertEqual(
+            [pk for pk, thumbnail in found.items() if thumbnail],
+            [self.ready.pk]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            thumbnails.preload_thumbnails(self.posts)
+        self.assertEqual(self.kvstore_queries(queries), [])
+
+    def test_cards_use_preloaded(self):
+        """Карточки ленты берут миниатюры из пакетной выборки"""
+        with CaptureQueriesContext(connection) as queries:
+            cards = render_cards(self.posts)
+        self.assertEqual(len(self.kvstore_queries(queries)), 1)
+        thumbnail = self.ready.preloaded_thumbnails['card']
+        self.assertEqual(sum(thumbnail.url in card for card in cards), 1)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class VariantTest(TestCase):
+    """Класс для тестирования вариантов картинки по ширинам"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), (200, 10, 10)).save(buffer, 'PNG')
+        self.post = Post.objects.create(
+            author=User.objects.create_user(username='author'),
+            text='Пост с большой картинкой',
+            image=SimpleUploadedFile('big.png', buffer.getvalue(),
+                                     'image/png'))
+
+    def test_variants_created(self):
+        """Варианты создаются по ширинам не больше исходной"""
+        manifest = create_variants(self.post.image.name)
+        self.assertEqual(manifest['widths'], [320, 640, 960])
+        self.assertEqual(manifest['formats'], ['WEBP', 'PNG'])
+        self.assertEqual(get_manifest(self.post.image.name), manifest)
+        path = f'{TEMP_MEDIA_ROOT}/{manifest["directory"]}/640.webp'
+        with Image.open(path) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (640, 226)))
+
+    def test_variants_not_recreated(self):
+        """Повторный вызов возвращает описание без перекодирования"""
+        manifest = create_variants(self.post.image.name)
+        with mock.patch('posts.variants._encode') as encode:
+            self.assertEqual(create_variants(self.post.image.name),
+                             manifest)
+        encode.assert_not_called()
+
+    def test_srcset_markup(self):
+        """Страница выводит srcset, sizes и ленивую загрузку"""
+        manifest = create_variants(self.post.image.name)
+        for url in (reverse('posts:index'),
+                    reverse('posts:post_detail', args=(self.post.pk,))):
+            with self.subTest(url=url):
+                content = Client().get(url).content.decode()
+                self.assertIn('<source type="image/webp"', content)
+                self.assertIn(
+                    f'/media/{manifest["directory"]}/320.webp 320w', content)
+                self.assertIn(
+                    f'/media/{manifest["directory"]}/960.png 960w', content)
+                self.assertIn('loading="lazy"', content)
+                self.assertIn('sizes="(min-width: 992px)', content)
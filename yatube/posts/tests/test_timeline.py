@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    """Класс для тестирования материализованной ленты подписок."""
+
+    def setUp(self):
+        """Создаём автора, подписчика и пост автора."""
+        self.author = User.objects.create_user(username='author')
+        self.follower = User.objects.create_user(username='follower')
+        self.post = Post.objects.create(author=self.author,
+                                        text='Пост до подписки')
+        self.client_follower = Client()
+        self.client_follower.force_login(self.follower)
+
+    def inbox(self):
+        return list(TimelineEntry.objects.filter(
+            user=self.follower
+        ).values_list('post_id', flat=True))
+
+    def test_follow_backfills_inbox(self):
+        """Подписка добавляет в ленту уже опубликованные посты."""
+        self.client_follower.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(self.inbox(), [self.post.pk])
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает во входящие подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.inbox(), [new_post.pk, self.post.pk])
+        response = self.client_follower.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']),
+                         [new_post, self.post])
+
+    def test_unfollow_trims_inbox(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.client_follower.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(self.inbox(), [])
+
+    def test_rebuild_command(self):
+        """Команда пересобирает ленту с нуля."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timeline', self.follower.username,
+                     stdout=StringIO())
+        self.assertEqual(self.inbox(), [self.post.pk])
@@ -11,8 +11,10 @@ from django.urls import reverse
 
 from core.assert_func.assert_func import assert_func
 
-from ..models import Follow, Group, Post, Comment
+from ..models import Follow, Group, Post, Comment, FeedCard
+from ..feed_cache import INDEX_SCOPE, feed_versions
 from ..forms import CommentForm
+from .utils import run_on_commit
 
 User = get_user_model()
 POST_NUMBER_1 = 10  # Кол-во выводимых постов на первой стр
@@ -22,7 +24,8 @@ COMMENTS_COUNT = 1  # Кол-во комментариев
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+# Тесты контекста: у страницы из кэша страниц нет response.context
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PAGE_CACHE_ENABLED=False)
 class PostViewTest(TestCase):
     """Класс для тестирования view-функций posts"""
 
@@ -325,6 +328,7 @@ class PostViewTest(TestCase):
         )
 
 
+@override_settings(PAGE_CACHE_ENABLED=False)
 class PaginatorViewsTest(TestCase):
     """Класс для тестирования paginator."""
 
@@ -448,6 +452,7 @@ class CacheTests(TestCase):
 
     def setUp(self):
         """Создаём гостя и авторизованного пользователя."""
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='Alex_Beglov')
         self.authorized_client = Client()
@@ -456,14 +461,42 @@ class CacheTests(TestCase):
     def test_cache_index(self):
         """Тест кэширования страницы index.html."""
         first_state = self.authorized_client.get(reverse('posts:index'))
-        post_1 = Post.objects.get(pk=1)
-        post_1.delete()
+        changed = {'text': 'Изменено', 'text_html': 'Изменено'}
+        Post.objects.filter(pk=CacheTests.post.pk).update(**changed)
+        FeedCard.objects.filter(pk=CacheTests.post.pk).update(**changed)
         second_state = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(first_state.content, second_state.content)
         cache.clear()
         third_state = self.authorized_client.get(reverse('posts:index'))
         self.assertNotEqual(first_state.content, third_state.content)
 
+    def test_cache_index_invalidated_on_delete(self):
+        """Удаление поста сразу сбрасывает кэш ленты."""
+        first_state = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(first_state, CacheTests.post.text)
+        with run_on_commit():
+            Post.objects.get(pk=CacheTests.post.pk).delete()
+        second_state = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotContains(second_state, CacheTests.post.text)
+
+    def test_cache_version_bumped_after_commit(self):
+        """Версия ленты меняется только после фиксации транзакции."""
+        before = feed_versions(INDEX_SCOPE)
+        with run_on_commit():
+            Post.objects.create(author=CacheTests.author, text='Пост')
+            self.assertEqual(feed_versions(INDEX_SCOPE), before)
+        self.assertNotEqual(feed_versions(INDEX_SCOPE), before)
+
+    def test_cache_group_invalidated_on_create(self):
+        """Новый пост сразу появляется в кэшированной ленте группы."""
+        group = Group.objects.create(title='Группа', slug='cache_slug')
+        url = reverse('posts:group_list', kwargs={'slug': group.slug})
+        self.guest_client.get(url)
+        with run_on_commit():
+            Post.objects.create(author=CacheTests.author,
+                                text='Свежий пост', group=group)
+        self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
     def test_cache_paginator(self):
         """Тест того, что разные страницы пагинатора отдают разный контент."""
         posts = []
@@ -0,0 +1,165 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore
+
+from .variants import (create_variants, load_manifest, source_file,
+                       variants_store_key)
+
+logger = logging.getLogger(__name__)
+
+# Все размеры миниатюр, которые используют шаблоны: имя -> (геометрия, опции)
+THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+LOCK_TIMEOUT = 60 * 5  # Сколько держится блокировка генерации, сек
+
+_executor = None  # Пул потоков процесса, создаётся при первой задаче
+_in_flight = {}  # Имя картинки -> Future её генерации в этом процессе
+_lock = threading.Lock()
+
+
+def _lock_key(name):
+    return f'thumbnail_lock:{name}'
+
+
+def _options(source, options):
+    """Опции миниатюры, дополненные так же, как в бэкенде sorl."""
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(image, size):
+    """Файл миниатюры картинки без обращения к хранилищу и kvstore."""
+    geometry, options = THUMBNAIL_SIZES[size]
+    source = source_file(image)
+    name = default.backend._get_thumbnail_filename(
+        source, geometry, _options(source, options))
+    return ImageFile(name, default.storage)
+
+
+def ready_thumbnail(image, size):
+    """Готовая миниатюра из kvstore или None, если её ещё нет."""
+    if not image:
+        return None
+    return default.kvstore.get(thumbnail_file(image, size))
+
+
+def _kvstore_values(keys):
+    """Значения ключей kvstore: один get_many к кэшу и один IN-запрос
+    к таблице sorl для промахов. Промахи кэшируются, как в sorl."""
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBStore):
+        return {key: kvstore._get_raw(key) for key in keys}
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(KVStore.objects.filter(
+            key__in=missing).values_list('key', 'value'))
+        kvstore.cache.set_many(
+            {key: found.get(key, EMPTY_VALUE) for key in missing},
+            sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(found)
+    return {key: value for key, value in values.items()
+            if value != EMPTY_VALUE}
+
+
+def preload_thumbnails(posts):
+    """Найти готовые миниатюры и варианты всех постов страницы разом.
+    Результат кладётся в post.preloaded_thumbnails (размер -> файл
+    или None) и post.preloaded_variants (описание вариантов или None),
+    их читают теги ready_thumbnail и post_picture.
+    """
+    thumbnails = {}
+    variants = {}
+    for post in posts:
+        post.preloaded_thumbnails = dict.fromkeys(THUMBNAIL_SIZES)
+        post.preloaded_variants = None
+        if post.image:
+            for size in THUMBNAIL_SIZES:
+                key = add_prefix(thumbnail_file(post.image, size).key)
+                thumbnails.setdefault(key, []).append((post, size))
+            variants.setdefault(
+                variants_store_key(post.image), []).append(post)
+    values = _kvstore_values([*thumbnails, *variants])
+    for key, value in values.items():
+        if not value:
+            continue
+        for post, size in thumbnails.get(key, ()):
+            post.preloaded_thumbnails[size] = deserialize_image_file(value)
+        for post in variants.get(key, ()):
+            post.preloaded_variants = load_manifest(value)
+
+
+def generate_thumbnails(name, on_ready=None):
+    """Создать миниатюры всех размеров и варианты для картинки name.
+    Блокировка в общем кэше не даёт другим процессам делать ту же
+    работу. Возвращает False, если миниатюры уже создаются.
+    """
+    if not cache.add(_lock_key(name), True, LOCK_TIMEOUT):
+        return False
+    try:
+        for geometry, options in THUMBNAIL_SIZES.values():
+            default.backend.get_thumbnail(source_file(name), geometry,
+                                          **options)
+        create_variants(name)
+    finally:
+        cache.delete(_lock_key(name))
+    if on_ready is not None:
+        on_ready()
+    return True
+
+
+def _run(name, on_ready):
+    """Задача пула: генерация с закрытием соединения потока с БД."""
+    try:
+        return generate_thumbnails(name, on_ready)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры %s', name)
+        return False
+    finally:
+        connection.close()
+        with _lock:
+            _in_flight.pop(name, None)
+
+
+def schedule_thumbnails(name, on_ready=None):
+    """Поставить генерацию миниатюр картинки в пул процесса.
+    Повторный вызов для той же картинки возвращает ту же задачу.
+    При POSTS_THUMBNAIL_WORKERS = 0 генерация идёт сразу.
+    """
+    global _executor
+    if not settings.POSTS_THUMBNAIL_WORKERS:
+        future = Future()
+        future.set_result(generate_thumbnails(name, on_ready))
+        return future
+    with _lock:
+        future = _in_flight.get(name)
+        if future is not None:
+            return future
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.POSTS_THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails')
+        future = _in_flight[name] = _executor.submit(_run, name, on_ready)
+        return future
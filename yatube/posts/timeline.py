@@ -0,0 +1,65 @@
+from django.db import transaction
+
+from .models import FeedCard, Follow, Post, TimelineEntry
+
+TIMELINE_BATCH_SIZE = 500  # Размер пачки при вставке в ленту
+
+
+def _bulk_insert(entries):
+    """Вставить записи ленты пачками, пропуская уже существующие."""
+    TimelineEntry.objects.bulk_create(entries,
+                                      batch_size=TIMELINE_BATCH_SIZE,
+                                      ignore_conflicts=True)
+
+
+def timeline_cards(user):
+    """Карточки ленты подписок пользователя в виде постов.
+    Чтение идёт по индексу (user, -pub_date) таблицы ленты.
+    """
+    return FeedCard.objects.filter(
+        timeline_entries__user=user
+    ).order_by('-timeline_entries__pub_date').as_posts()
+
+
+def fan_out_post(post):
+    """Разослать новый пост во входящие подписчиков автора."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    with transaction.atomic():
+        _bulk_insert(
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers.iterator()
+        )
+
+
+def backfill_inbox(user_id, author_id):
+    """Добавить в ленту пользователя посты нового избранного автора."""
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    with transaction.atomic():
+        _bulk_insert(
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts.iterator()
+        )
+
+
+def trim_inbox(user_id, author_id):
+    """Убрать из ленты пользователя посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild_inbox(user_id):
+    """Пересобрать ленту пользователя с нуля по таблице подписок."""
+    posts = Post.objects.filter(
+        author__following__user_id=user_id
+    ).values_list('pk', 'pub_date')
+    with transaction.atomic():
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+        _bulk_insert(
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts.iterator()
+        )
@@ -0,0 +1,148 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, features
+from sorl.thumbnail import default
+from sorl.thumbnail.helpers import deserialize
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from .storage import post_image_storage
+
+VARIANT_WIDTHS = (320, 640, 960, 1920)  # Ширины вариантов картинки, px
+VARIANT_RATIO = (960, 339)  # Пропорции кадра карточки: ширина, высота
+VARIANT_SIZES = '(min-width: 992px) 720px, 100vw'  # Атрибут sizes
+VARIANT_PREFIX = 'variants'  # Каталог вариантов в хранилище миниатюр
+VARIANT_IDENTITY = 'variants'  # Вид записи описания вариантов в kvstore
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+FORMATS = {
+    'JPEG': ('jpg', 'image/jpeg'),
+    'PNG': ('png', 'image/png'),
+    'GIF': ('gif', 'image/gif'),
+    'WEBP': ('webp', 'image/webp'),
+}
+
+
+def source_file(image):
+    """Картинка поста (файл поля или имя) для sorl
+    с хранилищем поля Post.image."""
+    return ImageFile(getattr(image, 'name', image), post_image_storage)
+
+
+def variants_key(image):
+    """Ключ описания вариантов картинки в kvstore sorl."""
+    return source_file(image).key
+
+
+def variants_store_key(image):
+    """Ключ описания вариантов с префиксами kvstore."""
+    return add_prefix(variants_key(image), VARIANT_IDENTITY)
+
+
+def _crop(image):
+    """Вырезать из центра кадр с пропорциями карточки."""
+    width, height = image.size
+    ratio_width, ratio_height = VARIANT_RATIO
+    crop_width = min(width, height * ratio_width // ratio_height)
+    crop_height = min(height, width * ratio_height // ratio_width)
+    left = (width - crop_width) // 2
+    top = (height - crop_height) // 2
+    return image.crop((left, top, left + crop_width, top + crop_height))
+
+
+def _encode(image, image_format):
+    """Байты картинки в формате image_format."""
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    elif image_format == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    options = {}
+    if image_format == 'JPEG':
+        options = {'quality': JPEG_QUALITY, 'progressive': True,
+                   'optimize': True}
+    elif image_format == 'WEBP':
+        options = {'quality': WEBP_QUALITY, 'method': 4}
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def create_variants(name):
+    """Создать варианты картинки name по ширинам VARIANT_WIDTHS
+    в WebP и в исходном формате и записать их описание в kvstore.
+    Ширины больше исходной пропускаются, кроме самой малой.
+    Уже созданные варианты не перекодируются.
+    """
+    manifest = get_manifest(name)
+    if manifest is not None:
+        return manifest
+    source = source_file(name)
+    with source.storage.open(source.name) as file:
+        image = Image.open(file)
+        original_format = image.format
+        image.load()
+    if original_format not in FORMATS:
+        original_format = 'JPEG'
+    formats = [original_format]
+    if original_format != 'WEBP' and features.check('webp'):
+        formats.insert(0, 'WEBP')
+    frame = _crop(image)
+    widths = [width for width in VARIANT_WIDTHS
+              if width <= frame.width] or VARIANT_WIDTHS[:1]
+    ratio_width, ratio_height = VARIANT_RATIO
+    key = variants_key(name)
+    directory = f'{VARIANT_PREFIX}/{key[:2]}/{key[2:4]}/{key}'
+    for width in widths:
+        height = round(width * ratio_height / ratio_width)
+        resized = frame.resize((width, height), Image.LANCZOS)
+        for image_format in formats:
+            path = f'{directory}/{width}.{FORMATS[image_format][0]}'
+            if default.storage.exists(path):
+                default.storage.delete(path)
+            default.storage.save(
+                path, ContentFile(_encode(resized, image_format)))
+    manifest = {'directory': directory, 'widths': widths,
+                'formats': formats}
+    default.kvstore._set(key, manifest, identity=VARIANT_IDENTITY)
+    return manifest
+
+
+def load_manifest(value):
+    """Описание вариантов из значения kvstore."""
+    return deserialize(value) if value else None
+
+
+def get_manifest(image):
+    """Описание вариантов картинки или None, если их ещё нет."""
+    if not image:
+        return None
+    return default.kvstore._get(variants_key(image),
+                                identity=VARIANT_IDENTITY)
+
+
+def picture(manifest):
+    """Данные для разметки <picture>: источники srcset по форматам
+    и запасной src в исходном формате шириной не больше кадра карточки."""
+    directory = manifest['directory']
+    ratio_width, ratio_height = VARIANT_RATIO
+    sources = []
+    for image_format in manifest['formats']:
+        extension, mime = FORMATS[image_format]
+        srcset = ', '.join(
+            f'{default.storage.url(f"{directory}/{width}.{extension}")} '
+            f'{width}w'
+            for width in manifest['widths']
+        )
+        sources.append({'type': mime, 'srcset': srcset})
+    extension = FORMATS[manifest['formats'][-1]][0]
+    width = max([width for width in manifest['widths']
+                 if width <= ratio_width] or manifest['widths'][:1])
+    return {
+        'sources': sources[:-1],
+        'srcset': sources[-1]['srcset'],
+        'src': default.storage.url(f'{directory}/{width}.{extension}'),
+        'sizes': VARIANT_SIZES,
+        'width': width,
+        'height': round(width * ratio_height / ratio_width),
+    }
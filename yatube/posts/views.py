@@ -1,33 +1,52 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.vary import vary_on_cookie
 from django.views.generic import CreateView
 
+from .conditional import (conditional_page, follow_validators,
+                          group_validators, index_validators,
+                          post_detail_validators, profile_validators)
+from .counters import user_stats
+from .feed_cache import (FEED_CACHE_TIMEOUT, INDEX_SCOPE, author_scope,
+                         feed_cache_key, follow_scope, group_scope)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import FeedCard, Follow, Group, Post
+from .page_cache import cache_page_with_holes
 from .paginator.paginator import custom_paginator
+from .timeline import timeline_cards
 
 User = get_user_model()
 DEFAULT_POSTS_NUMBER = 10  # Базовое число выводимых постов
 
 
+@vary_on_cookie
+@conditional_page(index_validators)
+@cache_page_with_holes(lambda: (INDEX_SCOPE,))
 def index(request):
     """Главная страница
         posts : Объект типа Post
         template : Шаблон html
         context : Словарь контекста
     """
-    post_list = Post.objects.select_related('group', 'author').all()
-    page_obj = custom_paginator(request, post_list, DEFAULT_POSTS_NUMBER)
+    post_list = FeedCard.objects.as_posts()
+    page_obj = custom_paginator(request, post_list, DEFAULT_POSTS_NUMBER,
+                                cursor=settings.POSTS_CURSOR_PAGINATION)
     template = 'posts/index.html'
     context = {
         'page_obj': page_obj,
+        'feed_cache_key': feed_cache_key(page_obj, INDEX_SCOPE),
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
     }
     return render(request, template, context)
 
 
+@vary_on_cookie
+@conditional_page(group_validators)
+@cache_page_with_holes(lambda slug: (group_scope(slug),))
 def group_posts(request, slug):
     """Фильтрация по группам
         slug : Уникальный фрагмент URL
@@ -36,21 +55,32 @@ def group_posts(request, slug):
         context : Словарь контекста
     """
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author').all()
-    page_obj = custom_paginator(request, post_list, DEFAULT_POSTS_NUMBER)
+    post_list = FeedCard.objects.filter(group=group).as_posts()
+    page_obj = custom_paginator(request, post_list, DEFAULT_POSTS_NUMBER,
+                                cursor=settings.POSTS_CURSOR_PAGINATION,
+                                count=group.posts_count)
     template = 'posts/group_list.html'
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_cache_key': feed_cache_key(page_obj, group_scope(group.slug)),
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
     }
     return render(request, template, context)
 
 
+@vary_on_cookie
+@conditional_page(profile_validators)
+@cache_page_with_holes(lambda username: (author_scope(username),))
 def profile(request, username):
     """Профайл пользователя"""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group').all()
-    page_obj = custom_paginator(request, post_list, DEFAULT_POSTS_NUMBER)
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    stats = user_stats(author)
+    post_list = FeedCard.objects.filter(author=author).as_posts()
+    page_obj = custom_paginator(request, post_list, DEFAULT_POSTS_NUMBER,
+                                cursor=settings.POSTS_CURSOR_PAGINATION,
+                                count=stats.posts_count)
     template = 'posts/profile.html'
     following = (
         request.user.is_authenticated
@@ -59,14 +89,22 @@ def profile(request, username):
         'author': author,
         'page_obj': page_obj,
         'following': following,
+        'feed_cache_key': feed_cache_key(page_obj,
+                                         author_scope(author.username)),
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
     }
     return render(request, template, context)
 
 
+@vary_on_cookie
+@conditional_page(post_detail_validators)
 def post_detail(request, post_id):
     """Страница поста"""
-    post = get_object_or_404(Post.objects.select_related('author', 'group'),
-                             pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        pk=post_id
+    )
+    user_stats(post.author)
     comments = post.comments.select_related('author').all()
     form = CommentForm()
     context = {
@@ -111,7 +149,8 @@ def post_edit(request, post_id):
         instance=post,
     )
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        post.save(update_fields=(*PostForm.Meta.fields, 'updated'))
         return redirect(related_path, post_id=post_id)
     context = {
         'form': form,
@@ -135,11 +174,19 @@ def add_comment(request, post_id):
 
 
 @login_required
+@vary_on_cookie
+@conditional_page(follow_validators)
 def follow_index(request):
     """Лента подписок"""
-    list_of_posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = custom_paginator(request, list_of_posts, DEFAULT_POSTS_NUMBER)
-    context = {'page_obj': page_obj}
+    list_of_posts = timeline_cards(request.user)
+    page_obj = custom_paginator(request, list_of_posts, DEFAULT_POSTS_NUMBER,
+                                cursor=settings.POSTS_CURSOR_PAGINATION)
+    context = {
+        'page_obj': page_obj,
+        'feed_cache_key': feed_cache_key(page_obj,
+                                         follow_scope(request.user.pk)),
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+    }
     template = 'posts/follow.html'
     return render(request, template, context)
 
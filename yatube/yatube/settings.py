@@ -69,6 +69,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'posts.page_cache.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -153,14 +154,34 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки пишутся во временный файл кусками, а не читаются в память
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Общий для всех воркеров кэш в файле SQLite (WAL) с вытеснением LRU
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
+# Курсорная пагинация лент по (pub_date, id) без COUNT(*) и OFFSET
+POSTS_CURSOR_PAGINATION = False
+
+# Потоков генерации миниатюр после загрузки; 0 - генерация сразу
+POSTS_THUMBNAIL_WORKERS = 2
+
+# Кэш страниц лент с поздним рендерингом пользовательских фрагментов
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
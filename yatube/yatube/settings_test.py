@@ -0,0 +1,13 @@
+"""Настройки для тестов: manage.py test --settings=yatube.settings_test
+и pytest (pytest.ini)."""
+from .settings import *  # noqa: F401,F403
+
+# Тесты не делят кэш с сервером и между запусками: кэш в памяти процесса
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}